@@ -0,0 +1,255 @@
+"""ASGI-обёртка над WSGI-приложением Django.
+
+В Django 2.2 нет асинхронных вьюх и ORM, поэтому код вьюх выполняется
+в пулах потоков, а всё остальное — на event loop: тело запроса
+дочитывается и ответ отправляется асинхронно, и медленные клиенты не
+держат поток. Чтение каталога (списки и карточки произведений,
+отзывов и комментариев) идёт в отдельный пул ``ASGI_READ_THREADS``,
+чтобы тяжёлые запросы на запись и выгрузки его не занимали.
+
+Тело больше ``ASGI_MAX_BODY_SIZE`` отклоняется с 413, не дочитываясь.
+Пока идёт ответ, отдельная задача ждёт ``http.disconnect``: uvicorn
+молча отбрасывает ``send`` после отключения, и без неё брошенная
+выгрузка держала бы поток и курсор до конца.
+
+Готовые адаптеры (``WsgiToAsgi`` из asgiref, a2wsgi) запускают
+приложение в своём пуле потоков, а здесь нужно выбирать пул по
+запросу; asgiref к тому же не входит в зависимости Django 2.2.
+"""
+import asyncio
+import json
+import re
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+
+CATALOGUE_READ = re.compile(
+    r'^/api/v1/titles/(\d+/)?(reviews/(\d+/)?(comments/(\d+/)?)?)?$')
+READ_METHODS = ('GET', 'HEAD')
+# Сколько кусков ответа может ждать отправки медленному клиенту.
+STREAM_BUFFER = 16
+
+
+def is_catalogue_read(scope):
+    return (scope['method'] in READ_METHODS
+            and CATALOGUE_READ.match(scope['path']) is not None)
+
+
+def content_length(scope):
+    for name, value in scope.get('headers', []):
+        if name.lower() == b'content-length':
+            try:
+                return int(value)
+            except ValueError:
+                return None
+    return None
+
+
+def latin1(value):
+    return value.encode('utf-8').decode('latin-1')
+
+
+def build_environ(scope, body):
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': latin1(scope.get('root_path', '')),
+        'PATH_INFO': latin1(scope['path']),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f'HTTP/{scope.get("http_version", "1.1")}',
+        'REMOTE_ADDR': client[0],
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            name = f'HTTP_{name}'
+        if name in environ:
+            separator = '; ' if name == 'HTTP_COOKIE' else ','
+            value = f'{environ[name]}{separator}{value}'
+        environ[name] = value
+    return environ
+
+
+class BodyTooLarge(Exception):
+    pass
+
+
+class ASGIHandler:
+
+    def __init__(self, wsgi_application):
+        self.wsgi_application = wsgi_application
+        self.read_executor = ThreadPoolExecutor(
+            settings.ASGI_READ_THREADS, thread_name_prefix='asgi-read')
+        self.executor = ThreadPoolExecutor(
+            settings.ASGI_THREADS, thread_name_prefix='asgi')
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+        if scope['type'] != 'http':
+            raise ValueError(f'Неподдерживаемый тип ASGI: {scope["type"]}')
+        length = content_length(scope)
+        if length is not None and length > settings.ASGI_MAX_BODY_SIZE:
+            return await self.reject_too_large(send)
+        try:
+            body = await self.read_body(receive)
+        except BodyTooLarge:
+            return await self.reject_too_large(send)
+        if body is None:
+            return
+        await self.respond(scope, body, receive, send)
+
+    async def respond(self, scope, body, receive, send):
+        executor = (self.read_executor if is_catalogue_read(scope)
+                    else self.executor)
+        loop = asyncio.get_running_loop()
+        stream = ResponseStream(loop, STREAM_BUFFER)
+        future = loop.run_in_executor(
+            executor, self.run, build_environ(scope, body), stream)
+        watcher = asyncio.ensure_future(self.watch_disconnect(receive, stream))
+        try:
+            started = await stream.get()
+            if started is None:
+                # Исключение в потоке до начала ответа
+                # или клиент отключился раньше.
+                await future
+                return
+            status, headers = started
+            await send({'type': 'http.response.start',
+                        'status': status, 'headers': headers})
+            while not stream.stopped:
+                chunk = await stream.get()
+                if chunk is None:
+                    break
+                await send({'type': 'http.response.body',
+                            'body': chunk, 'more_body': True})
+            # Ответ, оборванный исключением, не завершается: сервер
+            # закроет соединение, и клиент увидит неполный ответ.
+            await future
+            if not stream.stopped:
+                await send({'type': 'http.response.body'})
+        finally:
+            watcher.cancel()
+            # Поток перестанет читать ответ, если клиент отключился.
+            stream.stop()
+
+    async def read_body(self, receive):
+        """Дочитывает тело запроса; ``None``, если клиент отключился."""
+        body = bytearray()
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return None
+            body += message.get('body', b'')
+            if len(body) > settings.ASGI_MAX_BODY_SIZE:
+                raise BodyTooLarge
+            if not message.get('more_body', False):
+                return bytes(body)
+
+    async def watch_disconnect(self, receive, stream):
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                stream.stop()
+                return
+
+    async def reject_too_large(self, send):
+        body = json.dumps({
+            'detail': 'Тело запроса больше '
+                      f'{settings.ASGI_MAX_BODY_SIZE} байт.'
+        }, ensure_ascii=False).encode()
+        await send({'type': 'http.response.start', 'status': 413,
+                    'headers': [(b'content-type', b'application/json'),
+                                (b'content-length',
+                                 str(len(body)).encode())]})
+        await send({'type': 'http.response.body', 'body': body})
+
+    def run(self, environ, stream):
+        """Выполняет запрос и читает ответ целиком в одном потоке.
+
+        Курсор потокового ответа (``.iterator()`` в выгрузках)
+        принадлежит соединению с БД этого потока, а закрытие ответа
+        отправляет ``request_finished``, который закрывает соединения
+        этого же потока.
+        """
+        started = {}
+
+        def start_response(status, headers, exc_info=None):
+            started['status'] = int(status.split(' ', 1)[0])
+            started['headers'] = [
+                (name.lower().encode('latin-1'), value.encode('latin-1'))
+                for name, value in headers
+            ]
+
+        try:
+            response = self.wsgi_application(environ, start_response)
+            try:
+                if stream.put((started['status'], started['headers'])):
+                    for chunk in response:
+                        if chunk and not stream.put(chunk):
+                            break
+            finally:
+                if hasattr(response, 'close'):
+                    response.close()
+        finally:
+            stream.finish()
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.read_executor.shutdown(wait=True)
+                self.executor.shutdown(wait=True)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+
+class ResponseStream:
+    """Передаёт начало и куски ответа из потока пула в event loop.
+
+    Не больше ``size`` кусков ждут отправки: поток пула ждёт
+    медленного клиента, а не копит ответ в памяти.
+    """
+
+    def __init__(self, loop, size):
+        self.loop = loop
+        self.queue = asyncio.Queue()
+        self.slots = threading.Semaphore(size)
+        self.stopped = False
+
+    def put(self, message):
+        """Вызывается в потоке пула; ``False``, если ответ
+        больше никто не ждёт."""
+        self.slots.acquire()
+        if self.stopped:
+            return False
+        self.loop.call_soon_threadsafe(self.queue.put_nowait, message)
+        return True
+
+    def finish(self):
+        self.loop.call_soon_threadsafe(self.queue.put_nowait, None)
+
+    async def get(self):
+        message = await self.queue.get()
+        self.slots.release()
+        return message
+
+    def stop(self):
+        self.stopped = True
+        self.slots.release()
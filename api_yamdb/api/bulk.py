@@ -0,0 +1,191 @@
+"""Пакетное создание произведений.
+
+Пачка проверяется одним экземпляром ``TitlePostSerialzier``, slug'и
+всех элементов разрешаются заранее двумя запросами ``IN``, а
+произведения и их жанры вставляются через ``bulk_create``. Сигналы
+при этом не отправляются, поэтому поисковый индекс и кеш ответов
+обновляются здесь же.
+"""
+from functools import partial
+
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, connections
+from django.db import transaction
+from django.db.models import AutoField
+from django.db.models.sql import InsertQuery
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+
+from api.cache import invalidate_objects
+from api.fields import clear_slug_caches, get_slug_cache
+from api.serializers import TitlePostSerialzier
+from reviews.models import Category, Genre, Title
+from reviews.search import index_new_titles
+
+# SQLite умеет INSERT ... RETURNING с версии 3.35.
+SQLITE_RETURNING = (3, 35)
+
+
+class BatchTooLarge(APIException):
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = 'Слишком большая пачка.'
+    default_code = 'batch_too_large'
+
+
+def slugs(items, key, many=False):
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        values = item.get(key)
+        if not many:
+            values = [values]
+        if isinstance(values, (list, tuple)):
+            yield from (value for value in values if isinstance(value, str))
+
+
+def validate_titles(items, context=None):
+    """Возвращает пары ``(индекс, данные)`` для корректных элементов
+    и словарь ``{индекс: ошибки}`` для остальных."""
+    get_slug_cache(Genre).resolve(set(slugs(items, 'genre', many=True)))
+    get_slug_cache(Category).resolve(set(slugs(items, 'category')))
+    serializer = TitlePostSerialzier(context=context)
+    valid, errors = [], {}
+    for index, item in enumerate(items):
+        try:
+            valid.append((index, serializer.run_validation(item)))
+        except ValidationError as error:
+            errors[index] = error.detail
+    return valid, errors
+
+
+def insert_fields():
+    return [field for field in Title._meta.concrete_fields
+            if not isinstance(field, AutoField)]
+
+
+def insert_returning(titles, using):
+    """Вставляет пачки одним ``INSERT ... RETURNING`` на пачку.
+
+    У таблиц с AUTOINCREMENT каждая следующая строка получает больший
+    id, поэтому отсортированные ключи идут в порядке строк VALUES.
+    """
+    connection = connections[using]
+    fields = insert_fields()
+    size = max(connection.ops.bulk_batch_size(fields, titles), 1)
+    pk_column = connection.ops.quote_name(Title._meta.pk.column)
+    with connection.cursor() as cursor:
+        for start in range(0, len(titles), size):
+            batch = titles[start:start + size]
+            query = InsertQuery(Title)
+            query.insert_values(fields, batch)
+            (sql, params), = query.get_compiler(using=using).as_sql()
+            cursor.execute(f'{sql} RETURNING {pk_column}', params)
+            pks = sorted(row[0] for row in cursor.fetchall())
+            for title, pk in zip(batch, pks):
+                title.pk = pk
+    return titles
+
+
+def insert_titles(titles, using=DEFAULT_DB_ALIAS):
+    """Вставляет произведения; первичные ключи выдаёт база.
+
+    Если движок не возвращает ключи из ``bulk_create`` (SQLite в
+    Django 2.2), используется ``RETURNING``, а на старом SQLite
+    строки вставляются по одной в той же транзакции.
+    """
+    connection = connections[using]
+    if connection.features.can_return_ids_from_bulk_insert:
+        return Title.objects.using(using).bulk_create(titles)
+    if (
+        connection.vendor == 'sqlite'
+        and connection.Database.sqlite_version_info >= SQLITE_RETURNING
+    ):
+        return insert_returning(titles, using)
+    fields = insert_fields()
+    for title in titles:
+        title.pk = Title._base_manager.using(using)._insert(
+            [title], fields=fields, return_id=True)
+    return titles
+
+
+def check_references(valid, errors, using):
+    """Проверяет внутри транзакции вставки, что категории и жанры
+    ещё существуют: кеш slug'ов мог пережить их удаление в другом
+    воркере. Такие элементы переходят в ``errors``."""
+    category_ids = {data['category'].pk for _, data in valid
+                    if data.get('category') is not None}
+    genre_ids = {genre.pk for _, data in valid
+                 for genre in data.get('genre', ())}
+    categories = set(Category.objects.using(using).filter(
+        pk__in=category_ids).values_list('pk', flat=True))
+    genres = set(Genre.objects.using(using).filter(
+        pk__in=genre_ids).values_list('pk', flat=True))
+    if categories == category_ids and genres == genre_ids:
+        return valid
+    clear_slug_caches(Category, Genre)
+    fields = TitlePostSerialzier().fields
+    checked = []
+    for index, data in valid:
+        item_errors = {}
+        category = data.get('category')
+        if category is not None and category.pk not in categories:
+            item_errors['category'] = [missing(fields['category'], category)]
+        lost = [genre for genre in data.get('genre', ())
+                if genre.pk not in genres]
+        if lost:
+            item_errors['genre'] = [
+                missing(fields['genre'].child_relation, genre)
+                for genre in lost]
+        if item_errors:
+            errors[index] = item_errors
+        else:
+            checked.append((index, data))
+    return checked
+
+
+def missing(field, obj):
+    return field.error_messages['does_not_exist'].format(
+        slug_name=field.slug_field, value=obj.slug)
+
+
+def create_titles(items, context=None, using=DEFAULT_DB_ALIAS):
+    """Создаёт корректные элементы пачки и возвращает результат
+    по каждому элементу в порядке входных данных."""
+    valid, errors = validate_titles(items, context)
+    try:
+        valid = save_titles(valid, errors, using)
+    except IntegrityError:
+        # Категорию или жанр удалили между проверкой и коммитом:
+        # пачка проверяется заново уже без кеша slug'ов.
+        clear_slug_caches(Category, Genre)
+        valid, errors = validate_titles(items, context)
+        valid = save_titles(valid, errors, using)
+    results = [{'errors': errors[index]} if index in errors else None
+               for index in range(len(items))]
+    for index, title in valid:
+        results[index] = {'id': title.pk}
+    return results
+
+
+def save_titles(valid, errors, using):
+    """Вставляет проверенные элементы; возвращает пары
+    ``(индекс, произведение)``."""
+    through = Title.genre.through
+    with transaction.atomic(using=using):
+        valid = check_references(valid, errors, using)
+        if not valid:
+            return []
+        titles, genres = [], []
+        for _, data in valid:
+            data = dict(data)
+            genres.append({genre.pk for genre in data.pop('genre')})
+            titles.append(Title(**data))
+        insert_titles(titles, using)
+        through.objects.using(using).bulk_create(
+            through(title_id=title.pk, genre_id=genre_id)
+            for title, genre_ids in zip(titles, genres)
+            for genre_id in genre_ids
+        )
+        index_new_titles(titles, using)
+        transaction.on_commit(
+            partial(invalidate_objects, 'titles'), using=using)
+    return [(index, title) for (index, _), title in zip(valid, titles)]
@@ -0,0 +1,134 @@
+"""Кеш ответов для read-only эндпоинтов каталога.
+
+Ключ ответа включает путь, отсортированные параметры запроса и
+«поколения»: общее поколение пространства имён и поколение области —
+списков (``list``) или одного объекта (его pk). Сигналы моделей
+увеличивают поколения после коммита: ``invalidate`` сбрасывает всё
+пространство, ``invalidate_objects`` — списки и карточки указанных
+объектов.
+
+Поколения и ответы хранятся в общем для воркеров кеше
+``RESPONSE_CACHE_ALIAS``, поэтому запись в одном воркере сбрасывает
+кеш во всех.
+"""
+import time
+from collections import Counter
+from threading import Lock
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.http import urlencode
+from rest_framework import status
+from rest_framework.response import Response
+
+from api.metrics import cache_requests
+from api.replicas import primary_reads
+
+KEY_PREFIX = 'response'
+NAMESPACES = ('categories', 'genres', 'titles')
+
+stats = Counter()
+stats_lock = Lock()
+
+
+def get_cache():
+    return caches[settings.RESPONSE_CACHE_ALIAS]
+
+
+CACHE_RESULTS = {'hits': 'hit', 'misses': 'miss'}
+
+
+def count(event, namespace):
+    with stats_lock:
+        stats[(event, namespace)] += 1
+    cache_requests.inc(cache=namespace, result=CACHE_RESULTS[event])
+
+
+def cache_stats():
+    with stats_lock:
+        snapshot = dict(stats)
+    result = {}
+    for (event, namespace), value in snapshot.items():
+        result.setdefault(namespace, {'hits': 0, 'misses': 0})[event] = value
+    return result
+
+
+def generation_key(namespace):
+    return f'{KEY_PREFIX}:{namespace}:generation'
+
+
+def get_generation(namespace):
+    cache = get_cache()
+    generation = cache.get(generation_key(namespace))
+    if generation is None:
+        # Новое поколение не должно совпасть с вытесненным из кеша.
+        cache.add(generation_key(namespace), time.time_ns(), None)
+        generation = cache.get(generation_key(namespace))
+    return generation
+
+
+def invalidate(*namespaces):
+    cache = get_cache()
+    for namespace in namespaces:
+        try:
+            cache.incr(generation_key(namespace))
+        except ValueError:
+            cache.set(generation_key(namespace), time.time_ns(), None)
+
+
+def scope_namespace(namespace, scope):
+    return f'{namespace}:{scope}'
+
+
+def invalidate_objects(namespace, *pks):
+    """Сбрасывает списки пространства и карточки объектов ``pks``."""
+    invalidate(*(scope_namespace(namespace, scope)
+                 for scope in ('list', *pks)))
+
+
+def generation_tag(namespace, scope='list'):
+    return (f'{get_generation(namespace)}:'
+            f'{get_generation(scope_namespace(namespace, scope))}')
+
+
+def response_key(namespace, request, scope='list'):
+    query = urlencode(sorted(request.query_params.lists()), doseq=True)
+    return (f'{KEY_PREFIX}:{namespace}:{generation_tag(namespace, scope)}:'
+            f'{request.path}?{query}')
+
+
+class CachedResponseMixin:
+    """Кеширует данные ответов list."""
+    cache_namespace = None
+
+    def cached_response(self, handler, request, *args, scope='list',
+                        **kwargs):
+        cache = get_cache()
+        key = response_key(self.cache_namespace, request, scope)
+        data = cache.get(key)
+        if data is not None:
+            count('hits', self.cache_namespace)
+            return Response(data)
+        count('misses', self.cache_namespace)
+        # Отставшая реплика положила бы под новое поколение старые
+        # данные на RESPONSE_CACHE_TIMEOUT.
+        with primary_reads():
+            response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, response.data, settings.RESPONSE_CACHE_TIMEOUT)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+
+class CachedDetailResponseMixin(CachedResponseMixin):
+    """Кеширует данные ответов list и retrieve."""
+
+    def retrieve(self, request, *args, **kwargs):
+        scope = self.kwargs[self.lookup_url_kwarg or self.lookup_field]
+        if scope.isdigit():
+            # /titles/05/ — та же карточка, что и /titles/5/.
+            scope = str(int(scope))
+        return self.cached_response(
+            super().retrieve, request, *args, scope=scope, **kwargs)
@@ -0,0 +1,73 @@
+"""Условные GET запросы (ETag / Last-Modified).
+
+Валидатор строится одним агрегатным запросом по ``modified``, поэтому
+при совпадении ответ 304 отдаётся без загрузки и сериализации объектов.
+У списков нет ``Last-Modified``: удаление строки не сдвигает
+``Max(modified)``, а ETag учитывает и количество строк.
+
+Сравнение с валидаторами клиента всегда идёт по основной базе, так
+что 304 не подтвердит устаревшую копию. Если тело ответа 200 прочитано
+из реплики, его ETag считается там же: он описывает отданные данные,
+а не основную базу.
+"""
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework import status
+
+from api.replicas import current_replica, primary_reads
+
+
+class ConditionalGetMixin:
+    conditional_actions = ('list', 'retrieve')
+
+    def get_conditional_queryset(self):
+        queryset = self.filter_queryset(self.get_queryset())
+        if self.action == 'retrieve':
+            lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+            queryset = queryset.filter(
+                **{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        return queryset
+
+    def get_validators(self):
+        state = self.get_conditional_queryset().order_by().aggregate(
+            count=Count('pk'), last_pk=Max('pk'), modified=Max('modified'))
+        if state['modified'] is None:
+            return None, None
+        etag = '{count}-{last_pk}-{stamp}'.format(
+            stamp=int(state['modified'].timestamp() * 1_000_000), **state)
+        if self.action == 'list':
+            return etag, None
+        return etag, int(state['modified'].timestamp())
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        with primary_reads():
+            etag, last_modified = self.get_validators()
+        if etag is None:
+            return handler(request, *args, **kwargs)
+        response = get_conditional_response(
+            request, etag=quote_etag(etag), last_modified=last_modified)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            if current_replica() is not None:
+                etag, last_modified = self.get_validators()
+                if etag is None:
+                    return response
+        response['ETag'] = quote_etag(etag)
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        if 'list' not in self.conditional_actions:
+            return super().list(request, *args, **kwargs)
+        return self.conditional_response(
+            super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        if 'retrieve' not in self.conditional_actions:
+            return super().retrieve(request, *args, **kwargs)
+        return self.conditional_response(
+            super().retrieve, request, *args, **kwargs)
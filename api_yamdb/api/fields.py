@@ -0,0 +1,126 @@
+"""Поля сериализаторов, которые разрешают slug'и жанров и категорий
+через кеш в памяти процесса.
+
+Таблицы жанров и категорий маленькие и меняются редко, поэтому
+найденные объекты хранятся в словаре ``slug -> объект``. Недостающие
+slug'и всего запроса добираются одним запросом ``slug IN (...)``.
+
+Кеш привязан к поколению пространства имён кеша ответов
+(``api.cache``). Поколение лежит в общем для процессов кеше
+``RESPONSE_CACHE_ALIAS``: сигналы любого воркера увеличивают его после
+коммита, и остальные воркеры сбрасывают свои словари на следующем
+запросе. С локальным для процесса бэкендом остаётся только
+``SLUG_CACHE_TIMEOUT``.
+"""
+import time
+from threading import Lock
+
+from django.conf import settings
+from rest_framework import serializers
+from rest_framework.relations import MANY_RELATION_KWARGS
+
+from api.cache import get_generation
+
+# Пространства имён api.cache, которые сбрасываются при правке модели.
+SLUG_NAMESPACES = {
+    'reviews.category': 'categories',
+    'reviews.genre': 'genres',
+}
+
+
+class SlugCache:
+
+    def __init__(self, model):
+        self.model = model
+        self.namespace = SLUG_NAMESPACES.get(model._meta.label_lower)
+        self.lock = Lock()
+        self.clear()
+
+    def clear(self, generation=None):
+        with self.lock:
+            self.objects = {}
+            self.expires = time.monotonic() + settings.SLUG_CACHE_TIMEOUT
+            self.generation = generation
+
+    def current_generation(self):
+        if self.namespace is None:
+            return None
+        return get_generation(self.namespace)
+
+    def resolve(self, slugs):
+        """Возвращает словарь ``slug -> объект`` для найденных slug'ов."""
+        # Поколение читается до запроса в БД: правка, закоммиченная
+        # позже, сменит его, и следующий запрос сбросит словарь.
+        generation = self.current_generation()
+        if (
+            time.monotonic() >= self.expires
+            or generation != self.generation
+        ):
+            self.clear(generation)
+        objects = self.objects
+        missing = {slug for slug in slugs if slug not in objects}
+        if missing:
+            fetched = {
+                obj.slug: obj
+                for obj in self.model.objects.filter(slug__in=missing)
+            }
+            with self.lock:
+                self.objects.update(fetched)
+            objects = {**objects, **fetched}
+        return {slug: objects[slug] for slug in slugs if slug in objects}
+
+
+slug_caches = {}
+
+
+def get_slug_cache(model):
+    if model not in slug_caches:
+        slug_caches[model] = SlugCache(model)
+    return slug_caches[model]
+
+
+def clear_slug_caches(*models):
+    for model in models or tuple(slug_caches):
+        if model in slug_caches:
+            slug_caches[model].clear()
+
+
+class CachedManyRelatedField(serializers.ManyRelatedField):
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+        return self.child_relation.resolve(data)
+
+
+class CachedSlugRelatedField(serializers.SlugRelatedField):
+    """``SlugRelatedField`` по полю ``slug``, который при ``many=True``
+    разрешает весь список одним обращением к кешу."""
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('slug_field', 'slug')
+        super().__init__(**kwargs)
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return CachedManyRelatedField(**list_kwargs)
+
+    def to_internal_value(self, data):
+        return self.resolve([data])[0]
+
+    def resolve(self, slugs):
+        for slug in slugs:
+            if not isinstance(slug, str):
+                self.fail('invalid')
+        found = get_slug_cache(self.get_queryset().model).resolve(slugs)
+        for slug in slugs:
+            if slug not in found:
+                self.fail('does_not_exist',
+                          slug_name=self.slug_field, value=slug)
+        return [found[slug] for slug in slugs]
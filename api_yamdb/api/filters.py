@@ -1,10 +1,12 @@
 from django_filters.rest_framework import CharFilter, FilterSet, NumberFilter
+from rest_framework.filters import OrderingFilter
 
 from reviews.models import Title
+from reviews.search import RANK_FIELD, search_titles
 
 
 class TitleFilter(FilterSet):
-    name = CharFilter(field_name='name', lookup_expr='icontains')
+    name = CharFilter(method='filter_name')
     category = CharFilter(field_name='category__slug')
     genre = CharFilter(field_name='genre__slug')
     year = NumberFilter(field_name='year')
@@ -12,3 +14,46 @@ class TitleFilter(FilterSet):
     class Meta:
         model = Title
         fields = ('name', 'category', 'genre', 'year',)
+
+    def filter_name(self, queryset, name, value):
+        return search_titles(queryset, value)
+
+
+class RankOrderingFilter(OrderingFilter):
+    """При полнотекстовом поиске без явного ``ordering``
+    сначала выдаются наиболее релевантные произведения.
+
+    Вычисляемые поля сортируются по выражениям из
+    ``ordering_expressions`` вьюхи: свойства модели
+    ``OrderingFilter`` молча отбрасывает.
+    """
+
+    def get_valid_fields(self, queryset, view, context={}):
+        valid_fields = super().get_valid_fields(queryset, view, context)
+        return valid_fields + [
+            (name, name) for name in getattr(view, 'ordering_expressions', {})
+        ]
+
+    def filter_queryset(self, request, queryset, view):
+        ordering = self.get_ordering(request, queryset, view)
+        if not ordering:
+            return queryset
+        expressions = getattr(view, 'ordering_expressions', {})
+        return queryset.order_by(*(
+            self.order_term(term, expressions) for term in ordering))
+
+    def order_term(self, term, expressions):
+        expression = expressions.get(term.lstrip('-'))
+        if expression is None:
+            return term
+        if term.startswith('-'):
+            return expression.desc()
+        return expression.asc()
+
+    def get_ordering(self, request, queryset, view):
+        if (
+            self.ordering_param not in request.query_params
+            and RANK_FIELD in queryset.query.extra_select
+        ):
+            return (RANK_FIELD,) + tuple(self.get_default_ordering(view))
+        return super().get_ordering(request, queryset, view)
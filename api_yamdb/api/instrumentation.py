@@ -0,0 +1,174 @@
+"""Замеры времени запроса: число запросов к БД и их время, время
+сериализации и рендеринга.
+
+``InstrumentationMiddleware`` отдаёт замеры в заголовке
+``Server-Timing`` (админам, а с ``INSTRUMENTATION_SERVER_TIMING`` всем),
+пишет их выборочно в лог ``api.instrumentation`` одной JSON-строкой,
+копит суммы по эндпоинтам (``ViewSet.action``) и передаёт замеры
+в гистограммы ``api.metrics``.
+"""
+import json
+import logging
+import random
+import threading
+import time
+from collections import defaultdict
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+from api.metrics import request_duration, request_queries
+
+logger = logging.getLogger(__name__)
+
+state = threading.local()
+
+PHASES = ('db', 'serialize', 'render')
+
+stats = defaultdict(lambda: dict.fromkeys(
+    ('count', 'duration', 'max_duration', 'queries') + PHASES, 0))
+stats_lock = threading.Lock()
+
+
+class RequestMetrics:
+
+    def __init__(self):
+        self.endpoint = None
+        self.queries = 0
+        self.durations = dict.fromkeys(PHASES, 0.0)
+        self.depth = dict.fromkeys(PHASES, 0)
+        self.total = 0.0
+
+    def record_query(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.durations['db'] += time.perf_counter() - started
+
+
+def current():
+    return getattr(state, 'metrics', None)
+
+
+@contextmanager
+def timed(phase):
+    """Добавляет время блока к фазе текущего запроса. Вложенные блоки
+    той же фазы (сериализатор внутри сериализатора) не суммируются."""
+    metrics = current()
+    if metrics is None or metrics.depth[phase]:
+        yield
+        return
+    metrics.depth[phase] += 1
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.durations[phase] += time.perf_counter() - started
+        metrics.depth[phase] -= 1
+
+
+class TimedSerializerMixin:
+
+    def to_representation(self, instance):
+        with timed('serialize'):
+            return super().to_representation(instance)
+
+
+def endpoint_name(request, view_func):
+    cls = getattr(view_func, 'cls', None)
+    if cls is None:
+        return getattr(request.resolver_match, 'view_name', None)
+    actions = getattr(view_func, 'actions', None) or {}
+    action = actions.get(request.method.lower(), request.method.lower())
+    return f'{cls.__name__}.{action}'
+
+
+def record(metrics):
+    with stats_lock:
+        endpoint = stats[metrics.endpoint]
+        endpoint['count'] += 1
+        endpoint['duration'] += metrics.total
+        endpoint['max_duration'] = max(endpoint['max_duration'],
+                                       metrics.total)
+        endpoint['queries'] += metrics.queries
+        for phase in PHASES:
+            endpoint[phase] += metrics.durations[phase]
+    request_duration.observe(metrics.total, endpoint=metrics.endpoint)
+    request_queries.observe(metrics.queries, endpoint=metrics.endpoint)
+
+
+def endpoint_stats():
+    """Средние по эндпоинтам в миллисекундах."""
+    with stats_lock:
+        snapshot = {name: dict(values) for name, values in stats.items()}
+    result = {}
+    for name, values in snapshot.items():
+        count = values['count']
+        result[name] = {
+            'count': count,
+            'avg_ms': round(values['duration'] / count * 1000, 3),
+            'max_ms': round(values['max_duration'] * 1000, 3),
+            'avg_queries': round(values['queries'] / count, 2),
+            **{f'avg_{phase}_ms': round(values[phase] / count * 1000, 3)
+               for phase in PHASES},
+        }
+    return result
+
+
+def server_timing(metrics):
+    durations = metrics.durations
+    return ', '.join((
+        f'db;dur={durations["db"] * 1000:.2f};'
+        f'desc="{metrics.queries} queries"',
+        f'serialize;dur={durations["serialize"] * 1000:.2f}',
+        f'render;dur={durations["render"] * 1000:.2f}',
+        f'total;dur={metrics.total * 1000:.2f}',
+    ))
+
+
+class InstrumentationMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = state.metrics = RequestMetrics()
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(metrics.record_query))
+                response = self.get_response(request)
+        finally:
+            state.metrics = None
+        metrics.total = time.perf_counter() - started
+        if metrics.endpoint is not None:
+            record(metrics)
+        if settings.INSTRUMENTATION_SERVER_TIMING or getattr(
+                getattr(request, 'user', None), 'is_admin', False):
+            response['Server-Timing'] = server_timing(metrics)
+        if (
+            random.random() < settings.INSTRUMENTATION_LOG_SAMPLE_RATE
+            or metrics.total >= settings.INSTRUMENTATION_SLOW_REQUEST
+        ):
+            self.log(request, response, metrics)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        current().endpoint = endpoint_name(request, view_func)
+
+    def log(self, request, response, metrics):
+        logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'endpoint': metrics.endpoint,
+            'status': response.status_code,
+            'duration_ms': round(metrics.total * 1000, 3),
+            'queries': metrics.queries,
+            **{f'{phase}_ms': round(metrics.durations[phase] * 1000, 3)
+               for phase in PHASES},
+        }, ensure_ascii=False))
@@ -0,0 +1,379 @@
+"""Метрики в текстовом формате Prometheus.
+
+Каждый воркер копит счётчики у себя: без ``METRICS_DIR`` — в памяти
+процесса, с ним — в собственном файле ``<pid>.db``, отображённом в
+память. Воркеры не делят ни файлов, ни блокировок; ``/metrics``
+складывает файлы всех воркеров каталога, поэтому любой воркер gunicorn
+отдаёт общие значения. Новый воркер забирает себе значения файлов
+завершившихся воркеров и удаляет эти файлы: каталог не растёт при
+перезапусках, а счётчики не убывают.
+
+Метрики, которые считаются в момент запроса (например, размер очереди
+писем), приложения добавляют через ``register_collector``.
+"""
+import fcntl
+import glob
+import json
+import mmap
+import os
+import struct
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.conf import settings
+
+HEADER = struct.Struct('q')
+KEY_LENGTH = struct.Struct('i')
+VALUE = struct.Struct('d')
+INITIAL_SIZE = 1 << 16
+
+INF = float('inf')
+
+
+def align(size):
+    return size + (-size % 8)
+
+
+def read_entries(data, used):
+    """Разбирает записи файла: длина ключа, ключ, выровненный
+    до 8 байт, и значение."""
+    position = HEADER.size
+    while position < used:
+        length = KEY_LENGTH.unpack_from(data, position)[0]
+        key_start = position + KEY_LENGTH.size
+        value_position = align(key_start + length)
+        key = bytes(data[key_start:key_start + length]).decode()
+        yield key, VALUE.unpack_from(data, value_position)[0], value_position
+        position = value_position + VALUE.size
+
+
+class MemoryValues:
+
+    def __init__(self):
+        self.values = defaultdict(float)
+
+    def inc(self, key, amount):
+        self.values[key] += amount
+
+    def items(self):
+        return list(self.values.items())
+
+
+class FileValues:
+    """Значения одного воркера в файле, отображённом в память."""
+
+    def __init__(self, path):
+        self.file = open(path, 'a+b')
+        if os.fstat(self.file.fileno()).st_size == 0:
+            self.file.truncate(INITIAL_SIZE)
+        self.map = mmap.mmap(self.file.fileno(), 0)
+        self.used = HEADER.unpack_from(self.map, 0)[0] or HEADER.size
+        self.positions = {
+            key: position
+            for key, _, position in read_entries(self.map, self.used)
+        }
+
+    def position(self, key):
+        position = self.positions.get(key)
+        if position is not None:
+            return position
+        encoded = key.encode()
+        entry = align(KEY_LENGTH.size + len(encoded)) + VALUE.size
+        if self.used + entry > len(self.map):
+            self.grow(self.used + entry)
+        KEY_LENGTH.pack_into(self.map, self.used, len(encoded))
+        start = self.used + KEY_LENGTH.size
+        self.map[start:start + len(encoded)] = encoded
+        position = align(start + len(encoded))
+        VALUE.pack_into(self.map, position, 0.0)
+        # Размер обновляется последним: читатель не увидит
+        # недописанную запись.
+        self.used += entry
+        HEADER.pack_into(self.map, 0, self.used)
+        self.positions[key] = position
+        return position
+
+    def grow(self, needed):
+        size = len(self.map)
+        while size < needed:
+            size *= 2
+        self.map.close()
+        self.file.truncate(size)
+        self.map = mmap.mmap(self.file.fileno(), 0)
+
+    def inc(self, key, amount):
+        position = self.position(key)
+        VALUE.pack_into(
+            self.map, position,
+            VALUE.unpack_from(self.map, position)[0] + amount)
+
+    def items(self):
+        return [(key, value) for key, value, _ in
+                read_entries(self.map, self.used)]
+
+
+def pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+@contextmanager
+def directory_lock(directory, operation):
+    """Блокировка каталога: перенос файлов завершившихся воркеров
+    и чтение всех файлов не пересекаются."""
+    with open(os.path.join(directory, 'lock'), 'a') as file:
+        fcntl.flock(file, operation)
+        try:
+            yield
+        finally:
+            fcntl.flock(file, fcntl.LOCK_UN)
+
+
+def worker_files(directory):
+    for path in glob.glob(os.path.join(directory, '*.db')):
+        name = os.path.splitext(os.path.basename(path))[0]
+        if name.isdigit():
+            yield int(name), path
+
+
+def read_file(path):
+    with open(path, 'rb') as file:
+        data = file.read()
+    if len(data) < HEADER.size:
+        return []
+    return [(key, value) for key, value, _ in
+            read_entries(data, HEADER.unpack_from(data, 0)[0])]
+
+
+def absorb_dead_workers(directory, values):
+    with directory_lock(directory, fcntl.LOCK_EX):
+        for pid, path in worker_files(directory):
+            if pid == os.getpid() or pid_alive(pid):
+                continue
+            for key, value in read_file(path):
+                values.inc(key, value)
+            os.remove(path)
+
+
+class Store:
+    """Значения текущего процесса. После fork или смены
+    ``METRICS_DIR`` хранилище создаётся заново."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pid = None
+        self.directory = None
+        self.values = None
+
+    def get(self):
+        directory = settings.METRICS_DIR
+        if self.pid != os.getpid() or self.directory != directory:
+            self.pid, self.directory = os.getpid(), directory
+            if directory:
+                self.values = FileValues(
+                    os.path.join(directory, f'{self.pid}.db'))
+                absorb_dead_workers(directory, self.values)
+            else:
+                self.values = MemoryValues()
+        return self.values
+
+    def inc(self, key, amount=1.0):
+        with self.lock:
+            self.get().inc(key, amount)
+
+    def collect(self):
+        """Сумма значений всех воркеров."""
+        with self.lock:
+            values = self.get()
+            if not self.directory:
+                return dict(values.items())
+        totals = defaultdict(float)
+        with directory_lock(self.directory, fcntl.LOCK_SH):
+            for _, path in worker_files(self.directory):
+                for key, value in read_file(path):
+                    totals[key] += value
+        return totals
+
+
+store = Store()
+
+
+def sample_key(name, labels):
+    return json.dumps([name, sorted(labels.items())], ensure_ascii=False)
+
+
+class Metric:
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        registry.append(self)
+
+    def labels(self, values):
+        if set(values) != set(self.labelnames):
+            raise ValueError(f'{self.name}: метки {self.labelnames}')
+        return {name: str(value) for name, value in values.items()}
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(f'{name}_total', documentation, labelnames)
+
+    def inc(self, amount=1.0, **labels):
+        store.inc(sample_key(self.name, self.labels(labels)), amount)
+
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=()):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets) + (INF,)
+
+    def observe(self, value, **labels):
+        labels = self.labels(labels)
+        # Корзины хранятся накопительно: значение попадает во все
+        # корзины с границей не меньше него. Пустые тоже создаются,
+        # чтобы в выводе был полный набор корзин.
+        with store.lock:
+            values = store.get()
+            for bound in self.buckets:
+                values.inc(
+                    sample_key(f'{self.name}_bucket',
+                               {**labels, 'le': format_value(bound)}),
+                    1.0 if value <= bound else 0.0)
+            values.inc(sample_key(f'{self.name}_sum', labels), value)
+            values.inc(sample_key(f'{self.name}_count', labels), 1.0)
+
+
+registry = []
+
+request_duration = Histogram(
+    'api_request_duration_seconds',
+    'Время обработки запроса по эндпоинтам.',
+    ('endpoint',),
+    (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+request_queries = Histogram(
+    'api_request_queries',
+    'Число запросов к БД на один запрос к API.',
+    ('endpoint',),
+    (0, 1, 2, 3, 5, 10, 20, 50, 100),
+)
+cache_requests = Counter(
+    'api_cache_requests',
+    'Обращения к кешам ответов и пользователей.',
+    ('cache', 'result'),
+)
+signups = Counter(
+    'api_signups',
+    'Запросы кода подтверждения.',
+    ('result',),
+)
+tokens = Counter(
+    'api_tokens',
+    'Запросы токена.',
+    ('result',),
+)
+
+
+def format_value(value):
+    if value == INF:
+        return '+Inf'
+    return repr(float(value))
+
+
+def escape(value):
+    return (value.replace('\\', r'\\').replace('\n', r'\n')
+            .replace('"', r'\"'))
+
+
+def format_sample(name, labels, value):
+    if labels:
+        labels = ','.join(f'{label}="{escape(text)}"'
+                          for label, text in labels)
+        name = f'{name}{{{labels}}}'
+    return f'{name} {format_value(value)}'
+
+
+SUFFIXES = ('_bucket', '_sum', '_count')
+
+
+def sample_order(sample):
+    """Серии гистограммы идут подряд: корзины по возрастанию
+    границы, затем сумма и количество."""
+    name, labels, _ = sample
+    bound = dict(labels).get('le')
+    suffix = next((number for number, suffix in enumerate(SUFFIXES)
+                   if name.endswith(suffix)), 0)
+    return ([item for item in labels if item[0] != 'le'], suffix,
+            float(bound.replace('+Inf', 'inf')) if bound else 0)
+
+
+def cache_hit_ratios(samples):
+    requests = defaultdict(dict)
+    for name, labels, value in samples:
+        if name == cache_requests.name:
+            labels = dict(labels)
+            requests[labels['cache']][labels['result']] = value
+    return [
+        ((('cache', cache),), results.get('hit', 0) / sum(results.values()))
+        for cache, results in sorted(requests.items())
+        if sum(results.values())
+    ]
+
+
+collectors = []
+
+
+def register_collector(collector):
+    """Регистрирует функцию без аргументов, которая при запросе
+    метрик возвращает gauge-метрики: (имя, описание, [(метки,
+    значение)])."""
+    collectors.append(collector)
+    return collector
+
+
+def gauges(samples):
+    """Значения, которые считаются в момент запроса метрик."""
+    yield ('api_cache_hit_ratio',
+           'Доля попаданий в кеш с запуска воркеров.',
+           cache_hit_ratios(samples))
+    for collector in collectors:
+        yield from collector()
+
+
+def exposition():
+    samples = []
+    for key, value in store.collect().items():
+        name, labels = json.loads(key)
+        samples.append((name, tuple(map(tuple, labels)), value))
+    lines = []
+    for metric in registry:
+        lines.append(f'# HELP {metric.name} {metric.documentation}')
+        lines.append(f'# TYPE {metric.name} {metric.type}')
+        names = (
+            {f'{metric.name}{suffix}' for suffix in SUFFIXES}
+            if metric.type == 'histogram' else {metric.name}
+        )
+        lines.extend(
+            format_sample(*sample) for sample in
+            sorted((sample for sample in samples if sample[0] in names),
+                   key=sample_order)
+        )
+    for name, documentation, values in gauges(samples):
+        lines.append(f'# HELP {name} {documentation}')
+        lines.append(f'# TYPE {name} gauge')
+        lines.extend(format_sample(name, labels, value)
+                     for labels, value in values)
+    return '\n'.join(lines) + '\n'
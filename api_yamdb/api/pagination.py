@@ -0,0 +1,276 @@
+import hashlib
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as DecodeError
+from functools import partial, reduce
+from operator import or_
+
+from django.conf import settings
+from django.core.exceptions import EmptyResultSet
+from django.core.paginator import (EmptyPage, Page, PageNotAnInteger,
+                                   Paginator)
+from django.core.exceptions import ValidationError
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from api.cache import generation_tag, get_cache
+
+COUNT_KEY_PREFIX = 'count'
+
+
+def bounded_count(queryset):
+    """Считает строки не дальше порога ``PAGINATION_COUNT_THRESHOLD``.
+
+    Возвращает пару ``(количество, оценка ли это)``. Выше порога
+    точный ``COUNT(*)`` заменяется оценкой планировщика, а где её нет
+    (SQLite) — нижней границей.
+    """
+    threshold = settings.PAGINATION_COUNT_THRESHOLD
+    count = queryset.order_by()[:threshold + 1].count()
+    if count <= threshold:
+        return count, False
+    return max(estimate_count(queryset) or 0, count), True
+
+
+def estimate_count(queryset):
+    if connections[queryset.db].vendor != 'postgresql':
+        return None
+    plan = json.loads(queryset.order_by().explain(format='json'))
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def count_key(namespace, queryset):
+    sql, params = queryset.order_by().query.sql_with_params()
+    digest = hashlib.md5(f'{sql}{params!r}'.encode()).hexdigest()
+    return (f'{COUNT_KEY_PREFIX}:{namespace}:'
+            f'{generation_tag(namespace)}:{digest}')
+
+
+class EstimatedPage(Page):
+    """Страница, которая знает о следующей по лишней строке выборки,
+    а не по общему количеству."""
+
+    def __init__(self, object_list, number, paginator, has_next):
+        super().__init__(object_list, number, paginator)
+        self.next_exists = has_next
+
+    def has_next(self):
+        return self.next_exists
+
+
+class CountedPaginator(Paginator):
+    """Paginator, которому количество строк передаёт пагинация."""
+
+    def __init__(self, object_list, per_page, counter=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.counter = counter
+        self.estimated = False
+
+    @cached_property
+    def count(self):
+        if self.counter is None:
+            return super().count
+        count, self.estimated = self.counter()
+        return count
+
+    def validate_number(self, number):
+        if not self.count or not self.estimated:
+            return super().validate_number(number)
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger('Номер страницы должен быть числом.')
+        if number < 1:
+            raise EmptyPage('Номер страницы меньше 1.')
+        return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        if not self.estimated:
+            return super().page(number)
+        bottom = (number - 1) * self.per_page
+        objects = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not objects and number > 1:
+            raise EmptyPage('На этой странице нет результатов.')
+        return EstimatedPage(objects[:self.per_page], number, self,
+                             has_next=len(objects) > self.per_page)
+
+
+def encode_value(value):
+    # DjangoJSONEncoder обрезает микросекунды, а курсору нужна
+    # точная позиция.
+    return value.isoformat() if hasattr(value, 'isoformat') else value
+
+
+class KeysetPagination(BasePagination):
+    """Курсорная пагинация по составному ключу индекса.
+
+    Курсор хранит значения всех полей ``ordering`` последней (или
+    первой, для предыдущей страницы) строки, и следующая страница
+    выбирается условием ``(name, id) > (n, i)`` без ``OFFSET``.
+    Последнее поле ключа должно быть уникальным. Параметр
+    ``ordering`` из запроса игнорируется: курсор имеет смысл только
+    для порядка, под который построен индекс.
+    """
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Неверный курсор.'
+
+    def __init__(self, ordering, page_size):
+        self.ordering = ordering
+        self.page_size = page_size
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.base_url = request.build_absolute_uri()
+        self.fields = [queryset.model._meta.get_field(name)
+                       for name in self.ordering]
+        position, reverse = self.decode_cursor(request)
+        ordering = [f'-{name}' if reverse else name
+                    for name in self.ordering]
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self.after(position, reverse))
+        objects = list(queryset[:self.page_size + 1])
+        has_more = len(objects) > self.page_size
+        page = objects[:self.page_size]
+        if reverse:
+            page.reverse()
+            self.next_position = self.position(page[-1]) if page else None
+            self.previous_position = (
+                self.position(page[0]) if has_more else None)
+        else:
+            self.next_position = self.position(page[-1]) if has_more else None
+            self.previous_position = (
+                self.position(page[0])
+                if page and position is not None else None)
+        return page
+
+    def after(self, position, reverse):
+        """Строки строго после позиции в порядке обхода:
+        ``a > x OR (a = x AND b > y) ...``."""
+        lookup = 'lt' if reverse else 'gt'
+        conditions = []
+        for index, name in enumerate(self.ordering):
+            equal = dict(zip(self.ordering[:index], position[:index]))
+            conditions.append(
+                Q(**equal, **{f'{name}__{lookup}': position[index]}))
+        return reduce(or_, conditions)
+
+    def position(self, obj):
+        return [getattr(obj, field.attname) for field in self.fields]
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None, False
+        try:
+            cursor = json.loads(urlsafe_b64decode(encoded.encode()))
+            values = cursor['p']
+            if len(values) != len(self.fields):
+                raise ValueError
+            position = [field.to_python(value)
+                        for field, value in zip(self.fields, values)]
+            return position, bool(cursor.get('r'))
+        except (DecodeError, TypeError, ValueError, KeyError,
+                ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, position, reverse):
+        cursor = {'p': [encode_value(value) for value in position]}
+        if reverse:
+            cursor['r'] = 1
+        encoded = urlsafe_b64encode(
+            json.dumps(cursor, separators=(',', ':')).encode()).decode()
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        return self.encode_cursor(self.next_position, reverse=False)
+
+    def get_previous_link(self):
+        if self.previous_position is None:
+            return None
+        return self.encode_cursor(self.previous_position, reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+
+class SwitchablePagination(PageNumberPagination):
+    """Постраничная пагинация с курсорным режимом по запросу.
+
+    ``?pagination=cursor`` (или уже полученный ``?cursor=``) включает
+    keyset-пагинацию без ``COUNT(*)`` и ``OFFSET``.
+
+    В постраничном режиме ``count`` берётся из денормализованного
+    счётчика (метод ``get_pagination_count`` у вьюхи), из кеша по
+    пространству имён ``cache_namespace`` либо считается с порогом,
+    выше которого отдаётся оценка и ``count_estimated``.
+    """
+    mode_query_param = 'pagination'
+    cursor_query_param = 'cursor'
+    cursor_ordering = ('id',)
+
+    def use_cursor(self, request):
+        return (
+            request.query_params.get(self.mode_query_param) == 'cursor'
+            or self.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if self.use_cursor(request):
+            self.keyset = KeysetPagination(self.cursor_ordering,
+                                           self.page_size)
+            return self.keyset.paginate_queryset(queryset, request, view)
+        self.counter = partial(self.get_count, queryset, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def django_paginator_class(self, object_list, per_page):
+        # PageNumberPagination создаёт paginator через этот атрибут.
+        return CountedPaginator(object_list, per_page, counter=self.counter)
+
+    def get_count(self, queryset, view):
+        counter = getattr(view, 'get_pagination_count', None)
+        count = counter() if counter is not None else None
+        if count is not None:
+            return count, False
+        namespace = getattr(view, 'cache_namespace', None)
+        if namespace is None:
+            return bounded_count(queryset)
+        try:
+            key = count_key(namespace, queryset)
+        except EmptyResultSet:
+            return 0, False
+        cache = get_cache()
+        result = cache.get(key)
+        if result is None:
+            result = bounded_count(queryset)
+            cache.set(key, result, settings.PAGINATION_COUNT_TIMEOUT)
+        return result
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        response = super().get_paginated_response(data)
+        if self.page.paginator.estimated:
+            response.data['count_estimated'] = True
+        return response
+
+
+class TitlePagination(SwitchablePagination):
+    cursor_ordering = ('name', 'id')
+
+
+class PubDatePagination(SwitchablePagination):
+    cursor_ordering = ('pub_date', 'id')
@@ -0,0 +1,74 @@
+import codecs
+import json
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser
+from rest_framework.settings import api_settings
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def loads(value):
+    """``orjson.loads``, если он установлен. Как и ``JSONParser`` при
+    ``STRICT_JSON``, оба варианта отвергают ``NaN`` и ``Infinity``."""
+    if orjson is not None:
+        return orjson.loads(value)
+    return json.loads(value, parse_constant=reject_constant)
+
+
+def reject_constant(value):
+    raise ValueError(f'Недопустимое значение JSON: {value}')
+
+
+def is_utf8(encoding):
+    return codecs.lookup(encoding).name == 'utf-8'
+
+
+class FastJSONParser(JSONParser):
+    """``JSONParser`` на ``orjson``; без него работает как обычный."""
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if (
+            orjson is None
+            or not api_settings.STRICT_JSON
+            or not is_utf8(encoding)
+        ):
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except ValueError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
+
+
+class NDJSONParser(BaseParser):
+    """Разбирает поток JSON-объектов, по одному на строку, в список.
+
+    Если вьюха передаёт ``max_items`` в контексте парсера, разбор
+    останавливается на первой лишней строке.
+    """
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        max_items = parser_context.get('max_items')
+        items = []
+        for number, line in enumerate(stream, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            if max_items is not None and len(items) >= max_items:
+                raise ParseError(
+                    f'Больше {max_items} объектов в NDJSON.')
+            try:
+                items.append(loads(line.decode(encoding)))
+            except ValueError as error:
+                raise ParseError(f'Ошибка разбора NDJSON в строке {number}: '
+                                 f'{error}')
+        return items
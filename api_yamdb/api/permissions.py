@@ -1,3 +1,6 @@
+from ipaddress import ip_address, ip_network
+
+from django.conf import settings
 from rest_framework import permissions
 
 
@@ -18,7 +21,7 @@ class IsAuthorOrModeRatOrOrAdminOrReadOnly(
     def has_object_permission(self, request, view, obj):
         return (
             request.method in permissions.SAFE_METHODS
-            or obj.author == request.user
+            or obj.author_id == request.user.id
             or request.user.is_moderator
             or request.user.is_admin
         )
@@ -31,3 +34,19 @@ class IsAdmin(permissions.BasePermission):
             request.user.is_authenticated
             and request.user.is_admin
         )
+
+
+class IsAdminOrMetricsScraper(IsAdmin):
+    """Админ или адрес из ``METRICS_ALLOWED_IPS``."""
+
+    def has_permission(self, request, view):
+        try:
+            address = ip_address(request.META.get('REMOTE_ADDR', ''))
+        except ValueError:
+            address = None
+        return (
+            address is not None
+            and any(address in ip_network(network, strict=False)
+                    for network in settings.METRICS_ALLOWED_IPS)
+            or super().has_permission(request, view)
+        )
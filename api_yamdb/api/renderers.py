@@ -0,0 +1,53 @@
+"""Быстрый JSON-рендерер на ``orjson``.
+
+Вывод совпадает с ``rest_framework.renderers.JSONRenderer`` при
+настройках по умолчанию: компактные разделители, UTF-8 без
+экранирования, ``U+2028``/``U+2029`` экранированы, даты и ``Decimal``
+кодируются ``rest_framework.utils.encoders.JSONEncoder``. Если
+``orjson`` не установлен, запрошен отступ или выключен ``UNICODE_JSON``
+либо ``STRICT_JSON``, а также если ``orjson`` не смог закодировать
+данные, работает стандартный рендерер. Единственное
+расхождение: ``NaN`` превращается в ``null``, а не вызывает ошибку.
+"""
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+
+from api.instrumentation import timed
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    OPTIONS = (orjson.OPT_NON_STR_KEYS
+               | orjson.OPT_PASSTHROUGH_DATETIME
+               | orjson.OPT_PASSTHROUGH_DATACLASS)
+
+
+class FastJSONRenderer(JSONRenderer):
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with timed('render'):
+            return self.render_json(data, accepted_media_type,
+                                    renderer_context)
+
+    def render_json(self, data, accepted_media_type, renderer_context):
+        if (
+            orjson is None
+            or not api_settings.UNICODE_JSON
+            or not api_settings.STRICT_JSON
+            or self.get_indent(accepted_media_type or '',
+                               renderer_context or {})
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+        encoder = self.encoder_class()
+        try:
+            ret = orjson.dumps(data, default=encoder.default, option=OPTIONS)
+        except TypeError:
+            # orjson не кодирует целые шире 64 бит.
+            return super().render(data, accepted_media_type, renderer_context)
+        return ret.replace(
+            b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
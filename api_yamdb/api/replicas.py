@@ -0,0 +1,80 @@
+"""Чтение из реплик для безопасных запросов.
+
+Вьюхи с ``ReplicaReadMixin`` на время GET/HEAD/OPTIONS запроса
+включают чтение из одной из реплик ``DATABASE_REPLICAS``. Если
+запрос всё же пишет, роутер закрепляет его за основной базой до
+конца запроса, чтобы он читал собственные изменения. Запросы на
+запись реплики не используют вовсе.
+
+Реплика может отставать, поэтому по её данным не решается ничего, что
+переживает запрос: промахи общего кеша ответов читают основную базу
+(``primary_reads``), и по ней же проверяются ETag условных запросов.
+Поэтому у вьюх, все ответы которых кешируются (категории, жанры,
+произведения), миксина нет: реплики разгружают отзывы и комментарии.
+"""
+import random
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from rest_framework.permissions import SAFE_METHODS
+
+state = threading.local()
+
+
+def current_replica():
+    if getattr(state, 'pinned', True):
+        return None
+    return state.replica
+
+
+@contextmanager
+def replica_reads():
+    state.replica = random.choice(settings.DATABASE_REPLICAS)
+    state.pinned = False
+    try:
+        yield
+    finally:
+        state.replica, state.pinned = None, True
+
+
+@contextmanager
+def primary_reads():
+    pinned = getattr(state, 'pinned', True)
+    state.pinned = True
+    try:
+        yield
+    finally:
+        state.pinned = pinned
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        return current_replica()
+
+    def db_for_write(self, model, **hints):
+        state.pinned = True
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики содержат те же данные, что и основная база.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Схема реплик приходит с репликацией.
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
+
+
+class ReplicaReadMixin:
+
+    def dispatch(self, request, *args, **kwargs):
+        if (
+            request.method not in SAFE_METHODS
+            or not settings.DATABASE_REPLICAS
+        ):
+            return super().dispatch(request, *args, **kwargs)
+        with replica_reads():
+            return super().dispatch(request, *args, **kwargs)
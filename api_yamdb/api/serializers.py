@@ -3,9 +3,12 @@ import datetime as dt
 from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.shortcuts import get_object_or_404
+from django.db import IntegrityError, transaction
 from rest_framework import serializers
 
+from api.fields import CachedSlugRelatedField, clear_slug_caches
+from api.instrumentation import TimedSerializerMixin
+from api.sparse import SparseSerializerMixin
 from reviews.models import Category, Comments, Genre, Review, Title
 from users.models import User
 from users.validators import username_me
@@ -30,7 +33,8 @@ class TokenRegSerializer(serializers.Serializer):
         return username_me(value)
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(TimedSerializerMixin, SparseSerializerMixin,
+                     serializers.ModelSerializer):
     username = serializers.RegexField(max_length=settings.LIMIT_USERNAME,
                                       regex=r'^[\w.@+-]+\Z', required=True)
 
@@ -55,28 +59,30 @@ class UserEditSerializer(UserSerializer):
     role = serializers.CharField(read_only=True)
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(TimedSerializerMixin, serializers.ModelSerializer):
 
     class Meta:
         model = Category
         fields = ('name', 'slug')
 
 
-class GenreSerializer(serializers.ModelSerializer):
+class GenreSerializer(TimedSerializerMixin, serializers.ModelSerializer):
 
     class Meta:
         model = Genre
         fields = ('name', 'slug')
 
 
-class TitleSerializer(serializers.ModelSerializer):
+class TitleSerializer(TimedSerializerMixin, SparseSerializerMixin,
+                      serializers.ModelSerializer):
     genre = GenreSerializer(many=True)
     category = CategorySerializer()
     rating = serializers.IntegerField(default=1)
+    reviews_count = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Title
-        fields = ('id', 'name', 'year', 'rating',
+        fields = ('id', 'name', 'year', 'rating', 'reviews_count',
                   'description', 'genre', 'category',
                   )
         read_only_fields = ('id', 'name', 'year', 'rating',
@@ -84,17 +90,15 @@ class TitleSerializer(serializers.ModelSerializer):
                             )
 
 
-class TitlePostSerialzier(serializers.ModelSerializer):
-    genre = serializers.SlugRelatedField(
-        slug_field='slug',
+class TitlePostSerialzier(TimedSerializerMixin, serializers.ModelSerializer):
+    genre = CachedSlugRelatedField(
         queryset=Genre.objects.all(),
         many=True
     )
-    category = serializers.SlugRelatedField(
-        slug_field='slug',
+    category = CachedSlugRelatedField(
         queryset=Category.objects.all()
     )
-    rating = serializers.IntegerField(required=False)
+    rating = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Title
@@ -109,13 +113,62 @@ class TitlePostSerialzier(serializers.ModelSerializer):
             )
         return value
 
+    def create(self, validated_data):
+        genres = validated_data.pop('genre')
+        # Кеш ответов сбрасывается после коммита: к этому моменту
+        # жанры уже должны быть записаны.
+        try:
+            with transaction.atomic():
+                title = Title.objects.create(**validated_data)
+                title.set_genres(genres, created=True)
+        except IntegrityError:
+            self.raise_missing_references(
+                validated_data.get('category'), genres)
+            raise
+        return title
+
+    def update(self, instance, validated_data):
+        genres = validated_data.pop('genre', None)
+        try:
+            with transaction.atomic():
+                instance = super().update(instance, validated_data)
+                if genres is not None:
+                    instance.set_genres(genres)
+        except IntegrityError:
+            self.raise_missing_references(
+                validated_data.get('category'), genres)
+            raise
+        return instance
+
+    def raise_missing_references(self, category, genres):
+        """Категорию или жанр могли удалить в другом воркере, пока они
+        лежали в кеше slug'ов: тогда внешний ключ нарушается только при
+        коммите. Такая ошибка превращается в ошибку поля."""
+        clear_slug_caches(Category, Genre)
+        values = {
+            'category': None if category is None else category.slug,
+            'genre': None if genres is None else [
+                genre.slug for genre in genres],
+        }
+        errors = {}
+        for name, value in values.items():
+            if value is None:
+                continue
+            try:
+                self.fields[name].to_internal_value(value)
+            except serializers.ValidationError as error:
+                errors[name] = error.detail
+        if errors:
+            raise serializers.ValidationError(errors)
+
     def to_representation(self, instance):
         """Изменяет отображение информации в ответе (response)
          после POST запроса, в соответствии с ТЗ"""
         return TitleSerializer(instance).data
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(TimedSerializerMixin, SparseSerializerMixin,
+                       serializers.ModelSerializer):
     author = serializers.SlugRelatedField(
         read_only=True,
         slug_field='username'
@@ -127,22 +180,14 @@ class ReviewSerializer(serializers.ModelSerializer):
                           message='Максимальное значение рейтинга - 10')
     ])
 
-    def validate(self, data):
-        if self.context.get('request').method == 'POST':
-            author = self.context.get('request').user
-            title_id = self.context.get('view').kwargs.get('title_id')
-            title = get_object_or_404(Title, id=title_id)
-            if Review.objects.filter(title_id=title.id,
-                                     author=author).exists():
-                raise ValidationError('Может существовать только один отзыв!')
-        return data
-
     class Meta:
         model = Review
-        fields = ('id', 'text', 'author', 'score', 'pub_date')
+        fields = ('id', 'text', 'author', 'score', 'pub_date',
+                  'comments_count')
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(TimedSerializerMixin, SparseSerializerMixin,
+                        serializers.ModelSerializer):
     author = serializers.SlugRelatedField(
         read_only=True,
         slug_field='username'
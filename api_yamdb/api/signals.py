@@ -0,0 +1,79 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_save)
+
+from api.cache import invalidate, invalidate_objects
+from api.fields import clear_slug_caches
+from reviews.models import Category, Genre, Review, Title
+
+# Какие закешированные ответы зависят от модели: категории и жанры
+# вложены во все произведения.
+DEPENDENCIES = {
+    Category: ('categories', 'titles'),
+    Genre: ('genres', 'titles'),
+}
+
+
+def invalidate_responses(sender, using, **kwargs):
+    # До коммита параллельный запрос успел бы закешировать старые данные.
+    transaction.on_commit(
+        partial(invalidate, *DEPENDENCIES[sender]), using=using)
+
+
+for model in (Category, Genre):
+    post_save.connect(invalidate_responses, sender=model)
+    post_delete.connect(invalidate_responses, sender=model)
+
+
+def invalidate_titles(title_ids, using):
+    transaction.on_commit(
+        partial(invalidate_objects, 'titles', *title_ids), using=using)
+
+
+def title_changed(sender, instance, using, **kwargs):
+    invalidate_titles({instance.pk}, using)
+
+
+def remember_review_title(sender, instance, **kwargs):
+    # Снимок рейтинга обновляется в post_save раньше, чем здесь
+    # сбрасывается кеш, поэтому прежнее произведение берётся до сохранения.
+    snapshot = getattr(instance, '_rating_snapshot', None)
+    instance._previous_title_id = snapshot[0] if snapshot else None
+
+
+def review_changed(sender, instance, using, **kwargs):
+    # Отзыв меняет рейтинг только своего произведения.
+    title_ids = {instance.title_id,
+                 getattr(instance, '_previous_title_id', None)}
+    invalidate_titles(title_ids - {None}, using)
+
+
+def genres_changed(sender, instance, action, reverse, pk_set, using,
+                   **kwargs):
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        invalidate_titles({instance.pk}, using)
+    elif pk_set:
+        invalidate_titles(pk_set, using)
+    else:
+        transaction.on_commit(partial(invalidate, 'titles'), using=using)
+
+
+post_save.connect(title_changed, sender=Title)
+post_delete.connect(title_changed, sender=Title)
+pre_save.connect(remember_review_title, sender=Review)
+post_save.connect(review_changed, sender=Review)
+post_delete.connect(review_changed, sender=Review)
+m2m_changed.connect(genres_changed, sender=Title.genre.through)
+
+
+def forget_slugs(sender, **kwargs):
+    clear_slug_caches(sender)
+
+
+for model in (Category, Genre):
+    post_save.connect(forget_slugs, sender=model)
+    post_delete.connect(forget_slugs, sender=model)
@@ -0,0 +1,83 @@
+"""Сокращённые наборы полей: ``?fields=id,name`` и ``?omit=description``.
+
+Вьюха выбирает поля сериализатора и урезает под них запрос: ``only()``
+по нужным колонкам, ``select_related``/``prefetch_related`` только для
+запрошенных связей. Работает лишь для безопасных методов, запись
+всегда видит полный сериализатор.
+"""
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+
+
+def split_fields(value):
+    return {name.strip() for name in (value or '').split(',') if name.strip()}
+
+
+class SparseSerializerMixin:
+    """Оставляет поля, выбранные вьюхой по ``fields``/``omit``."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        selected = self.context.get('sparse_fields')
+        if selected is not None:
+            for name in set(self.fields) - set(selected):
+                self.fields.pop(name)
+
+
+class SparseFieldsetMixin:
+    fields_query_param = 'fields'
+    omit_query_param = 'omit'
+    # Колонки модели, нужные полю сериализатора, если они не совпадают
+    # с его именем. Пустой кортеж: поле не требует колонок.
+    sparse_columns = {}
+    # Поле сериализатора -> связь для select_related/prefetch_related.
+    sparse_select_related = {}
+    sparse_prefetch_related = {}
+
+    def get_sparse_fields(self):
+        """Список выбранных полей в порядке сериализатора или ``None``,
+        если набор полей не сокращали."""
+        if not hasattr(self, '_sparse_fields'):
+            self._sparse_fields = self.select_sparse_fields()
+        return self._sparse_fields
+
+    def select_sparse_fields(self):
+        if self.request is None or self.request.method not in SAFE_METHODS:
+            return None
+        params = self.request.query_params
+        fields = split_fields(params.get(self.fields_query_param))
+        omit = split_fields(params.get(self.omit_query_param))
+        if not fields and not omit:
+            return None
+        available = self.get_serializer_class().Meta.fields
+        unknown = (fields | omit) - set(available)
+        if unknown:
+            raise ValidationError({self.fields_query_param: [
+                'Неизвестные поля: ' + ', '.join(sorted(unknown))
+            ]})
+        return [name for name in available
+                if (not fields or name in fields) and name not in omit]
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['sparse_fields'] = self.get_sparse_fields()
+        return context
+
+    def trim_queryset(self, queryset):
+        fields = self.get_sparse_fields()
+        if fields is None:
+            return queryset
+        columns = {queryset.model._meta.pk.name}
+        select, prefetch = [], []
+        for name in fields:
+            columns.update(self.sparse_columns.get(name, (name,)))
+            if name in self.sparse_select_related:
+                select.append(self.sparse_select_related[name])
+            if name in self.sparse_prefetch_related:
+                prefetch.append(self.sparse_prefetch_related[name])
+        queryset = queryset.select_related(None).prefetch_related(None)
+        if select:
+            queryset = queryset.select_related(*select)
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        return queryset.only(*columns)
@@ -1,9 +1,9 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from .views import (CategoryViewSet, CommentViewSet, GenreViewSet,
-                    ReviewViewSet, TitleViewSet,
-                    UserViewSet)
+from .views import (CacheStatsApiView, CategoryViewSet, CommentViewSet,
+                    ExportApiView, GenreViewSet, RequestStatsApiView,
+                    ReviewViewSet, TitleViewSet, UserViewSet)
 
 app_name = 'api'
 
@@ -23,4 +23,9 @@ router.register(r'titles/(?P<title_id>\d+)/reviews',
 urlpatterns = [
     path('v1/', include(router.urls)),
     path('v1/auth/', include('users.urls')),
+    path('v1/cache-stats/', CacheStatsApiView.as_view(), name='cache_stats'),
+    path('v1/request-stats/', RequestStatsApiView.as_view(),
+         name='request_stats'),
+    path('v1/export/<slug:name>.<slug:export_format>',
+         ExportApiView.as_view(), name='export'),
 ]
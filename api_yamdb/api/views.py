@@ -1,32 +1,50 @@
 from django.conf import settings
 from django.contrib.auth.tokens import default_token_generator
-from django.core.mail import send_mail
-from django.db import IntegrityError
-from django.db.models import Avg
+from django.db import IntegrityError, transaction
+from django.db.models import ExpressionWrapper, F, FloatField
+from django.db.models.functions import NullIf
+from django.http import Http404, HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, mixins, status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework.views import APIView
 from rest_framework_simplejwt.tokens import RefreshToken
 
-from .filters import TitleFilter
-from .permissions import (IsAdmin, IsAdminOrReadOnly,
+from .bulk import BatchTooLarge, create_titles
+from .cache import (CachedDetailResponseMixin, CachedResponseMixin,
+                    cache_stats)
+from .conditional import ConditionalGetMixin
+from .filters import RankOrderingFilter, TitleFilter
+from .instrumentation import endpoint_stats
+from .metrics import exposition, signups, tokens
+from .pagination import PubDatePagination, TitlePagination
+from .parsers import FastJSONParser, NDJSONParser
+from .permissions import (IsAdmin, IsAdminOrMetricsScraper,
+                          IsAdminOrReadOnly,
                           IsAuthorOrModeRatOrOrAdminOrReadOnly)
+from .replicas import ReplicaReadMixin
 from .serializers import (CategorySerializer, CommentSerializer,
                           GenreSerializer, ReviewSerializer,
                           SignUpSerializer, TitlePostSerialzier,
                           TitleSerializer, TokenRegSerializer,
                           UserEditSerializer, UserSerializer)
+from .sparse import SparseFieldsetMixin
 
 
+from reviews.export import CONTENT_TYPES, EXPORTS, export_lines
 from reviews.models import Category, Genre, Review, Title
 from users.models import User
+from users.outbox import queue_mail
 
 
-class AdminViewSet(mixins.CreateModelMixin, mixins.ListModelMixin,
-                   mixins.DestroyModelMixin, viewsets.GenericViewSet):
+class AdminViewSet(CachedResponseMixin, mixins.CreateModelMixin,
+                   mixins.ListModelMixin, mixins.DestroyModelMixin,
+                   viewsets.GenericViewSet):
     permission_classes = (IsAdminOrReadOnly,)
     filter_backends = (filters.SearchFilter,)
     search_fields = ('name',)
@@ -36,50 +54,104 @@ class AdminViewSet(mixins.CreateModelMixin, mixins.ListModelMixin,
 class SignUpApiView(APIView):
     def post(self, request):
         serializer = SignUpSerializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
+        if not serializer.is_valid():
+            signups.inc(result='invalid')
+            raise ValidationError(serializer.errors)
+        username = serializer.validated_data.get('username')
+        email = serializer.validated_data.get('email')
         try:
-            username = serializer.validated_data.get('username')
-            email = serializer.validated_data.get('email')
-            user, _ = User.objects.get_or_create(
-                username=username,
-                email=email
-            )
+            # Пользователь и письмо с кодом сохраняются вместе:
+            # письмо не уйдёт, если транзакция откатится.
+            with transaction.atomic():
+                user, _ = User.objects.get_or_create(
+                    username=username,
+                    email=email
+                )
+                code = default_token_generator.make_token(user)
+                queue_mail(
+                    'Код токена',
+                    f'Код для получения токена {code}',
+                    settings.DEFAULT_FROM_EMAIL,
+                    [email]
+                )
         except IntegrityError:
+            signups.inc(result='conflict')
             return Response('Это имя или email уже занято',
                             status.HTTP_400_BAD_REQUEST)
-        code = default_token_generator.make_token(user)
-        send_mail(
-            'Код токена',
-            f'Код для получения токена {code}',
-            settings.DEFAULT_FROM_EMAIL,
-            [serializer.validated_data.get('email')]
-        )
+        signups.inc(result='sent')
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
 class TokenRegApiView(APIView):
     def post(self, request):
         serializer = TokenRegSerializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
+        if not serializer.is_valid():
+            tokens.inc(result='invalid')
+            raise ValidationError(serializer.errors)
         username = serializer.validated_data.get('username')
         confirmation_code = serializer.validated_data.get('confirmation_code')
         user = get_object_or_404(User, username=username)
         if not default_token_generator.check_token(user, confirmation_code):
+            tokens.inc(result='invalid')
             message = (
                 'Вы использовали неправильный или чужой код подтверждения.')
             return Response({message}, status=status.HTTP_400_BAD_REQUEST)
         token = RefreshToken.for_user(user)
+        tokens.inc(result='issued')
         return Response({'token': str(token.access_token)},
                         status=status.HTTP_200_OK)
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class ExportApiView(APIView):
+    permission_classes = (IsAdmin,)
+
+    def get(self, request, name, export_format):
+        if name not in EXPORTS or export_format not in CONTENT_TYPES:
+            raise Http404
+        response = StreamingHttpResponse(
+            export_lines(name, export_format),
+            content_type=CONTENT_TYPES[export_format]
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="{name}.{export_format}"')
+        return response
+
+
+class CacheStatsApiView(APIView):
+    permission_classes = (IsAdmin,)
+
+    def get(self, request):
+        return Response(cache_stats(), status=status.HTTP_200_OK)
+
+
+class RequestStatsApiView(APIView):
+    permission_classes = (IsAdmin,)
+
+    def get(self, request):
+        return Response(endpoint_stats(), status=status.HTTP_200_OK)
+
+
+class MetricsApiView(APIView):
+    """Метрики для Prometheus: суммы по всем воркерам."""
+    permission_classes = (IsAdminOrMetricsScraper,)
+
+    def get(self, request):
+        return HttpResponse(
+            exposition(),
+            content_type='text/plain; version=0.0.4; charset=utf-8'
+        )
+
+
+class UserViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = (IsAdmin,)
     filter_backends = (filters.SearchFilter,)
     lookup_field = 'username'
 
+    def get_queryset(self):
+        return self.trim_queryset(super().get_queryset())
+
     @action(
         methods=['patch', 'get'],
         detail=False,
@@ -99,51 +171,156 @@ class UserViewSet(viewsets.ModelViewSet):
 class CategoryViewSet(AdminViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+    cache_namespace = 'categories'
 
 
 class GenreViewSet(AdminViewSet):
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
+    cache_namespace = 'genres'
 
 
-class TitleViewSet(viewsets.ModelViewSet):
-    queryset = Title.objects.annotate(
-        rating=Avg('reviews__score'))
+class TitleViewSet(SparseFieldsetMixin, ConditionalGetMixin,
+                   CachedDetailResponseMixin, viewsets.ModelViewSet):
+    queryset = Title.objects.select_related(
+        'category').prefetch_related('genre')
     serializer_class = TitleSerializer
     permission_classes = (IsAdminOrReadOnly,)
+    filter_backends = (DjangoFilterBackend, RankOrderingFilter)
     filterset_class = TitleFilter
     filterset_fields = ('name',)
     ordering = ('name',)
+    pagination_class = TitlePagination
+    cache_namespace = 'titles'
+    conditional_actions = ('retrieve',)
+    sparse_columns = {
+        'rating': ('rating_sum', 'rating_count'),
+        'reviews_count': ('rating_count',),
+        'genre': (),
+        'category': ('category__name', 'category__slug'),
+    }
+    sparse_select_related = {'category': 'category'}
+    sparse_prefetch_related = {'genre': 'genre'}
+    ordering_expressions = {
+        'rating': ExpressionWrapper(
+            F('rating_sum') * 1.0 / NullIf(F('rating_count'), 0),
+            output_field=FloatField()),
+        'reviews_count': F('rating_count'),
+    }
+
+    def get_queryset(self):
+        return self.trim_queryset(super().get_queryset())
 
     def get_serializer_class(self):
         if self.request.method in ['POST', 'PUT', 'PATCH']:
             return TitlePostSerialzier
         return TitleSerializer
 
+    @action(
+        methods=['post'],
+        detail=False,
+        permission_classes=(IsAdmin,),
+        parser_classes=(FastJSONParser, NDJSONParser),
+    )
+    def bulk(self, request):
+        # Парсеры читают тело целиком, поэтому размер проверяется
+        # до обращения к request.data.
+        try:
+            length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            length = 0
+        if length > settings.TITLES_BULK_MAX_BYTES:
+            raise BatchTooLarge(
+                'Тело пачки больше '
+                f'{settings.TITLES_BULK_MAX_BYTES} байт.')
+        request.parser_context['max_items'] = settings.TITLES_BULK_LIMIT
+        items = request.data
+        if not isinstance(items, list):
+            raise ValidationError({api_settings.NON_FIELD_ERRORS_KEY: [
+                'Ожидается список произведений.'
+            ]})
+        if len(items) > settings.TITLES_BULK_LIMIT:
+            raise ValidationError({api_settings.NON_FIELD_ERRORS_KEY: [
+                'В одной пачке может быть не больше '
+                f'{settings.TITLES_BULK_LIMIT} произведений.'
+            ]})
+        results = create_titles(items, self.get_serializer_context())
+        created = sum('id' in result for result in results)
+        if created == len(results):
+            code = status.HTTP_201_CREATED
+        elif created:
+            code = status.HTTP_207_MULTI_STATUS
+        else:
+            code = status.HTTP_400_BAD_REQUEST
+        return Response({'created': created, 'results': results}, status=code)
 
-class ReviewViewSet(viewsets.ModelViewSet):
+
+class ReviewViewSet(ReplicaReadMixin, SparseFieldsetMixin,
+                    ConditionalGetMixin, viewsets.ModelViewSet):
     serializer_class = ReviewSerializer
     permission_classes = (IsAuthorOrModeRatOrOrAdminOrReadOnly,)
+    pagination_class = PubDatePagination
+    sparse_columns = {'author': ('author__username',)}
+    sparse_select_related = {'author': 'author'}
 
     def get_title(self):
-        return get_object_or_404(Title, id=self.kwargs.get("title_id"))
+        if not hasattr(self, '_title'):
+            self._title = get_object_or_404(
+                Title, id=self.kwargs.get("title_id"))
+        return self._title
 
     def get_queryset(self):
-        return self.get_title().reviews.all()
+        return self.trim_queryset(
+            self.get_title().reviews.select_related('author'))
+
+    def get_pagination_count(self):
+        # Каждый отзыв содержит оценку, поэтому число оценок
+        # произведения и есть число его отзывов.
+        return self.get_title().rating_count
 
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user, title=self.get_title())
+        # Повторный отзыв отсекает ограничение unique_author_title:
+        # одна вставка вместо проверки exists() перед ней. Отзыв ищется
+        # только после ошибки, чтобы отличить её от прочих нарушений.
+        title = self.get_title()
+        try:
+            serializer.save(author=self.request.user, title=title)
+        except IntegrityError:
+            if not Review.objects.filter(
+                    author=self.request.user, title=title).exists():
+                raise
+            raise ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [
+                    'Может существовать только один отзыв!'
+                ]
+            })
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(ReplicaReadMixin, SparseFieldsetMixin,
+                     ConditionalGetMixin, viewsets.ModelViewSet):
     serializer_class = CommentSerializer
     permission_classes = (IsAuthorOrModeRatOrOrAdminOrReadOnly,)
+    pagination_class = PubDatePagination
+    sparse_columns = {'author': ('author__username',)}
+    sparse_select_related = {'author': 'author'}
 
     def get_review(self):
-        return get_object_or_404(Review, id=self.kwargs.get('review_id'))
+        # Отзыв нужен и для ETag, и для списка: загружаем один раз,
+        # только если он относится к произведению из URL.
+        if not hasattr(self, '_review'):
+            self._review = get_object_or_404(
+                Review,
+                id=self.kwargs.get('review_id'),
+                title_id=self.kwargs.get('title_id'),
+            )
+        return self._review
 
     def get_queryset(self):
-        return self.get_review().comments.all()
+        return self.trim_queryset(
+            self.get_review().comments.select_related('author'))
+
+    def get_pagination_count(self):
+        return self.get_review().comments_count
 
     def perform_create(self, serializer):
         serializer.save(author=self.request.user, review=self.get_review())
@@ -0,0 +1,8 @@
+from django.apps import AppConfig
+
+
+class ProjectConfig(AppConfig):
+    name = 'api_yamdb'
+
+    def ready(self):
+        import api_yamdb.db  # noqa: F401
@@ -1,4 +1,5 @@
 import os
+import tempfile
 from datetime import timedelta
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -19,6 +20,7 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
     'rest_framework',
     'rest_framework_simplejwt',
+    'api_yamdb.apps.ProjectConfig',
     'users.apps.UsersConfig',
     'reviews.apps.ReviewsConfig',
     'api.apps.ApiConfig',
@@ -26,6 +28,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.instrumentation.InstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -56,6 +59,42 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'api_yamdb.wsgi.application'
 
+# Замеры запросов: заголовок Server-Timing, доля запросов, попадающих
+# в лог, и порог в секундах, выше которого запрос пишется в лог всегда.
+# Server-Timing раскрывает время запросов к БД, поэтому без
+# INSTRUMENTATION_SERVER_TIMING=true он отдаётся только админам.
+INSTRUMENTATION_SERVER_TIMING = os.getenv(
+    'INSTRUMENTATION_SERVER_TIMING', '').lower() == 'true'
+INSTRUMENTATION_LOG_SAMPLE_RATE = 0.01
+INSTRUMENTATION_SLOW_REQUEST = 1.0
+
+# Метрики Prometheus на /metrics. С METRICS_DIR каждый воркер gunicorn
+# пишет счётчики в свой файл в этом каталоге, а /metrics их складывает;
+# каталог очищается перед запуском. Без METRICS_DIR счётчики живут в
+# памяти процесса. Кроме админов, /metrics доступен адресам и сетям из
+# METRICS_ALLOWED_IPS (через пробел).
+METRICS_DIR = os.getenv('METRICS_DIR')
+METRICS_ALLOWED_IPS = os.getenv('METRICS_ALLOWED_IPS', '').split()
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'api.instrumentation': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
+# Пулы потоков ASGI: чтение каталога и все остальные запросы.
+ASGI_READ_THREADS = 16
+ASGI_THREADS = 8
+
 
 AUTH_USER_MODEL = 'users.User'
 
@@ -63,9 +102,85 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        # Файловая тестовая БД: в общей in-memory базе SQLite
+        # параллельные транзакции падают с "table is locked",
+        # а не ждут друг друга.
+        'TEST': {
+            'NAME': os.path.join(BASE_DIR, 'test_db.sqlite3'),
+        },
     }
 }
 
+# Профиль production: WAL, чтобы писатели не блокировали читателей,
+# прагмы выполняются при открытии соединения (api_yamdb.db),
+# соединения переиспользуются между запросами.
+DB_PROFILE = os.getenv('DB_PROFILE', 'development')
+
+SQLITE_PRAGMAS = {}
+
+if DB_PROFILE == 'production':
+    DATABASES['default']['CONN_MAX_AGE'] = 600
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -64 * 1024,
+        'mmap_size': 256 * 1024 * 1024,
+        'busy_timeout': 5000,
+        'temp_store': 'MEMORY',
+    }
+
+# Реплики только для чтения: DB_REPLICAS=/path/one.sqlite3,/path/two.sqlite3.
+# В тестах они указывают на тестовую основную базу.
+DATABASE_REPLICAS = []
+
+for number, path in enumerate(
+        filter(None, os.getenv('DB_REPLICAS', '').split(',')), start=1):
+    DATABASES[f'replica{number}'] = dict(
+        DATABASES['default'], NAME=path, TEST={'MIRROR': 'default'})
+    DATABASE_REPLICAS.append(f'replica{number}')
+
+DATABASE_ROUTERS = ['api.replicas.ReplicaRouter']
+
+# Кеш ответов и его поколения должны быть общими для всех воркеров
+# gunicorn: иначе запись сбрасывает кеш только в своём процессе.
+# По умолчанию это файловый кеш в RESPONSE_CACHE_DIR, в production
+# его можно заменить на memcached или redis.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv(
+            'RESPONSE_CACHE_DIR',
+            os.path.join(tempfile.gettempdir(), 'api_yamdb_cache')),
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
+
+RESPONSE_CACHE_ALIAS = 'shared'
+RESPONSE_CACHE_TIMEOUT = 60 * 5
+
+AUTH_USER_CACHE_ALIAS = 'default'
+AUTH_USER_CACHE_TIMEOUT = 60
+
+# Жанры и категории кешируются в памяти процесса. Правка в любом
+# воркере сбрасывает кеш во всех через поколение в общем кеше ответов
+# (RESPONSE_CACHE_ALIAS); TTL — страховка на случай правок мимо сигналов.
+SLUG_CACHE_TIMEOUT = 60
+
+# Пачка произведений ограничена и числом элементов, и размером тела:
+# размер проверяется по Content-Length до разбора JSON.
+TITLES_BULK_LIMIT = 10000
+TITLES_BULK_MAX_BYTES = 16 * 1024 * 1024
+# Тела больше пачки произведений не принимает ни один эндпоинт:
+# ASGI-обёртка отклоняет их с 413, не дочитывая.
+ASGI_MAX_BODY_SIZE = TITLES_BULK_MAX_BYTES
+
+# Выше порога пагинация не считает COUNT(*) целиком, а отдаёт оценку.
+PAGINATION_COUNT_THRESHOLD = 10000
+PAGINATION_COUNT_TIMEOUT = 30
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -103,13 +218,31 @@ EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 DEFAULT_FROM_EMAIL = 'reviews@api.api'
 
+# Письма ставятся в очередь OutgoingEmail, отправляет их команда
+# send_emails. При EMAIL_OUTBOX_SYNC=true письмо уходит сразу после
+# коммита, в потоке запроса: только для разработки без воркера.
+EMAIL_OUTBOX_SYNC = os.getenv('EMAIL_OUTBOX_SYNC', '').lower() == 'true'
+EMAIL_OUTBOX_MAX_ATTEMPTS = 5
+EMAIL_OUTBOX_BACKOFF = 30
+EMAIL_OUTBOX_LEASE = 300
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "users.authentication.CachedJWTAuthentication",
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
     ],
+    # orjson необязателен: без него классы ниже работают на stdlib json.
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'api.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 5,
     'DEFAULT_FILTER_BACKENDS': [
@@ -0,0 +1,31 @@
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from reviews.models import Comments, Review
+
+
+def change_comments_count(review_id, count):
+    """Сдвигает счётчик комментариев отзыва одним UPDATE.
+
+    Дата изменения отзыва тоже обновляется: счётчик входит в
+    представление отзыва, и ETag списка отзывов должен поменяться.
+    """
+    Review.objects.filter(pk=review_id).update(
+        comments_count=F('comments_count') + count,
+        modified=timezone.now(),
+    )
+
+
+def rebuild_comments_count(reviews=None):
+    """Пересчитывает счётчики комментариев с нуля."""
+    if reviews is None:
+        reviews = Review.objects.all()
+    comments = (Comments.objects.filter(review=OuterRef('pk'))
+                .order_by().values('review')
+                .annotate(total=Count('id')).values('total'))
+    return reviews.update(
+        comments_count=Coalesce(
+            Subquery(comments), 0, output_field=IntegerField()),
+        modified=timezone.now(),
+    )
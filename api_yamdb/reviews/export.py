@@ -0,0 +1,70 @@
+"""Потоковая выгрузка каталога в NDJSON и CSV.
+
+Колонки совпадают с файлами static/data, поэтому выгрузку можно
+загрузить обратно командой ``load_csv``.
+"""
+import csv
+import datetime as dt
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from reviews.models import Comments, Review, Title
+
+CHUNK_SIZE = 2000
+
+EXPORTS = {
+    'titles': (Title, (
+        ('id', 'id'), ('name', 'name'), ('year', 'year'),
+        ('category', 'category_id'), ('description', 'description'),
+    )),
+    'reviews': (Review, (
+        ('id', 'id'), ('text', 'text'), ('pub_date', 'pub_date'),
+        ('score', 'score'), ('author_id', 'author_id'),
+        ('title_id', 'title_id'),
+    )),
+    'comments': (Comments, (
+        ('id', 'id'), ('text', 'text'), ('pub_date', 'pub_date'),
+        ('author_id', 'author_id'), ('review_id', 'review_id'),
+    )),
+}
+FORMATS = ('csv', 'ndjson')
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+ENCODER = DjangoJSONEncoder()
+
+
+class Echo:
+    """Файлоподобный объект для csv.writer, возвращающий строку."""
+
+    def write(self, value):
+        return value
+
+
+def export_rows(name):
+    model, columns = EXPORTS[name]
+    fields = [field for _, field in columns]
+    return (model.objects.order_by('id').values_list(*fields)
+            .iterator(chunk_size=CHUNK_SIZE))
+
+
+def csv_value(value):
+    if isinstance(value, dt.datetime):
+        return ENCODER.default(value)
+    return value
+
+
+def export_lines(name, export_format):
+    """Построчно отдаёт выгрузку, не держа таблицу в памяти."""
+    headers = [header for header, _ in EXPORTS[name][1]]
+    if export_format == 'ndjson':
+        for row in export_rows(name):
+            yield ENCODER.encode(dict(zip(headers, row))) + '\n'
+        return
+    writer = csv.writer(Echo(), lineterminator='\n')
+    yield writer.writerow(headers)
+    for row in export_rows(name):
+        yield writer.writerow(csv_value(value) for value in row)
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from reviews.export import EXPORTS, FORMATS, export_lines
+
+
+class Command(BaseCommand):
+    help = 'Выгружает произведения, отзывы или комментарии в CSV/NDJSON.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('name', choices=sorted(EXPORTS))
+        parser.add_argument('--format', dest='export_format',
+                            choices=FORMATS, default='csv')
+        parser.add_argument('--output', help='Файл для выгрузки, '
+                            'по умолчанию стандартный вывод.')
+
+    def handle(self, *args, **options):
+        lines = export_lines(options['name'], options['export_format'])
+        if not options['output']:
+            for line in lines:
+                self.stdout.write(line, ending='')
+            return
+        with open(options['output'], 'w', encoding='utf-8') as file:
+            file.writelines(lines)
@@ -0,0 +1,238 @@
+import csv
+import os
+import time
+from itertools import islice
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.core.management.color import no_style
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from api.cache import NAMESPACES, invalidate
+from api.fields import clear_slug_caches
+from reviews.counters import rebuild_comments_count
+from reviews.models import Category, Comments, Genre, Review, Title
+from reviews.ratings import rebuild_ratings
+from reviews.search import rebuild_index
+from users.models import User
+
+DEFAULT_PATH = os.path.join(settings.BASE_DIR, 'static', 'data')
+BATCH_SIZE = 5000
+
+
+class IdSet:
+    """Множество id в виде битовой карты: десятки миллионов
+    id занимают единицы мегабайт."""
+
+    def __init__(self):
+        self.bits = bytearray()
+
+    def add(self, pk):
+        index = pk >> 3
+        if index >= len(self.bits):
+            self.bits.extend(bytes(index - len(self.bits) + 1))
+        self.bits[index] |= 1 << (pk & 7)
+
+    def __contains__(self, pk):
+        index = pk >> 3
+        return (
+            index < len(self.bits)
+            and bool(self.bits[index] & 1 << (pk & 7))
+        )
+
+
+def to_bool(value, default=False):
+    if not value:
+        return default
+    return value.lower() in ('1', 'true', 't', 'yes')
+
+
+def to_datetime(value):
+    return parse_datetime(value) if value else None
+
+
+class Command(BaseCommand):
+    help = 'Загружает данные из CSV файлов static/data в базу.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default=DEFAULT_PATH,
+                            help='Каталог с CSV файлами.')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                            help='Размер пачки для bulk_create.')
+
+    def handle(self, *args, **options):
+        self.path = options['path']
+        self.batch_size = options['batch_size']
+        self.now = timezone.now()
+        self.ids = {model: self.existing_ids(model)
+                    for model in (User, Category, Genre, Title, Review)}
+        # Файлы перечислены в порядке зависимостей по внешним ключам.
+        self.load('users.csv', User, self.user)
+        self.load('category.csv', Category, self.category)
+        self.load('genre.csv', Genre, self.genre)
+        self.load('titles.csv', Title, self.title, after=rebuild_index)
+        self.load('genre_title.csv', Title.genre.through, self.genre_title)
+        self.load('review.csv', Review, self.review, after=rebuild_ratings)
+        self.load('comments.csv', Comments, self.comment,
+                  after=rebuild_comments_count)
+        # bulk_create не отправляет сигналы: счётчики пересчитываются
+        # после загрузки файлов, кеш ответов сбрасываем сами.
+        invalidate(*NAMESPACES)
+        clear_slug_caches(Category, Genre)
+
+    def existing_ids(self, model):
+        ids = IdSet()
+        for pk in model.objects.values_list('pk', flat=True).iterator():
+            ids.add(pk)
+        return ids
+
+    def load(self, filename, model, build, after=None):
+        filepath = os.path.join(self.path, filename)
+        if not os.path.exists(filepath):
+            self.stdout.write(self.style.WARNING(f'{filename}: нет файла'))
+            return
+        started = time.perf_counter()
+        total = loaded = conflicts = 0
+        with open(filepath, encoding='utf-8', newline='') as file:
+            objects = (build(row) for row in csv.DictReader(file))
+            with transaction.atomic():
+                while True:
+                    batch = list(islice(objects, self.batch_size))
+                    if not batch:
+                        break
+                    total += len(batch)
+                    batch = [obj for obj in batch if obj is not None]
+                    loaded += len(batch)
+                    self.insert(model, batch)
+                    if model in self.ids:
+                        conflicts += len(batch) - self.confirm(model, batch)
+                self.reset_sequence(model)
+                if after is not None:
+                    after()
+        elapsed = time.perf_counter() - started
+        message = (f'{filename}: {total} строк за {elapsed:.2f} с '
+                   f'({total / elapsed if elapsed else 0:.0f} строк/с)')
+        if total != loaded:
+            message += (f', пропущено {total - loaded} строк '
+                        'со ссылками на несуществующие объекты')
+        if conflicts:
+            message += (f', не вставлено {conflicts} строк, конфликтующих '
+                        'с записями в базе')
+        self.stdout.write(self.style.SUCCESS(message))
+
+    def insert(self, model, objs):
+        """Вставляет пачку как loaddata: без pre_save, поэтому
+        auto_now и auto_now_add не подменяют даты из файла. Строки,
+        нарушающие ограничения, пропускаются."""
+        fields = model._meta.concrete_fields
+        ops = connections[DEFAULT_DB_ALIAS].ops
+        size = max(ops.bulk_batch_size(fields, objs), 1)
+        for start in range(0, len(objs), size):
+            model._base_manager._insert(
+                objs[start:start + size], fields=fields, raw=True,
+                ignore_conflicts=True)
+
+    def reset_sequence(self, model):
+        """Строки вставлены с id из файла: как и loaddata, сдвигаем
+        последовательность (PostgreSQL), иначе следующая вставка
+        через API получит занятый id."""
+        connection = connections[DEFAULT_DB_ALIAS]
+        statements = connection.ops.sequence_reset_sql(no_style(), [model])
+        if statements:
+            with connection.cursor() as cursor:
+                for sql in statements:
+                    cursor.execute(sql)
+
+    def confirm(self, model, objs):
+        """Запоминает id строк, которые действительно есть в базе.
+
+        Вставка с ignore_conflicts молча пропускает, например,
+        пользователя с занятым username: его id не должен пройти
+        проверку внешних ключей зависимых строк."""
+        pks = [obj.pk for obj in objs]
+        size = connections[DEFAULT_DB_ALIAS].ops.bulk_batch_size(['pk'], pks)
+        confirmed = 0
+        for start in range(0, len(pks), size):
+            for pk in model._base_manager.filter(
+                pk__in=pks[start:start + size]
+            ).values_list('pk', flat=True):
+                self.ids[model].add(pk)
+                confirmed += 1
+        return confirmed
+
+    def user(self, row):
+        return User(
+            id=int(row['id']),
+            password=row['password'],
+            last_login=to_datetime(row['last_login']),
+            is_superuser=to_bool(row['is_superuser']),
+            username=row['username'],
+            first_name=row['first_name'],
+            last_name=row['last_name'],
+            is_staff=to_bool(row['is_staff']),
+            is_active=to_bool(row['is_active'], default=True),
+            date_joined=to_datetime(row['date_joined']) or timezone.now(),
+            email=row['email'],
+            bio=row['bio'],
+            role=row['role'] or User.USER,
+        )
+
+    def category(self, row):
+        return Category(
+            id=int(row['id']), name=row['name'], slug=row['slug'])
+
+    def genre(self, row):
+        return Genre(
+            id=int(row['id']), name=row['name'], slug=row['slug'])
+
+    def title(self, row):
+        category_id = int(row['category']) if row['category'] else None
+        if category_id is not None and category_id not in self.ids[Category]:
+            category_id = None
+        return Title(
+            id=int(row['id']),
+            name=row['name'],
+            year=int(row['year']),
+            description=row['description'],
+            category_id=category_id,
+            modified=self.now,
+        )
+
+    def genre_title(self, row):
+        title_id, genre_id = int(row['title_id']), int(row['genre_id'])
+        if title_id not in self.ids[Title] or genre_id not in self.ids[Genre]:
+            return None
+        return Title.genre.through(
+            id=int(row['id']), title_id=title_id, genre_id=genre_id)
+
+    def review(self, row):
+        title_id, author_id = int(row['title_id']), int(row['author_id'])
+        if title_id not in self.ids[Title] or author_id not in self.ids[User]:
+            return None
+        return Review(
+            id=int(row['id']),
+            text=row['text'],
+            pub_date=to_datetime(row['pub_date']) or self.now,
+            modified=self.now,
+            score=int(row['score']),
+            author_id=author_id,
+            title_id=title_id,
+        )
+
+    def comment(self, row):
+        review_id, author_id = int(row['review_id']), int(row['author_id'])
+        if (
+            review_id not in self.ids[Review]
+            or author_id not in self.ids[User]
+        ):
+            return None
+        return Comments(
+            id=int(row['id']),
+            text=row['text'],
+            pub_date=to_datetime(row['pub_date']) or self.now,
+            modified=self.now,
+            author_id=author_id,
+            review_id=review_id,
+        )
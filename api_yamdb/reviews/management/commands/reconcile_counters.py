@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from reviews.counters import rebuild_comments_count
+from reviews.ratings import rebuild_ratings
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает денормализованные счётчики: рейтинг и число '
+            'отзывов произведений, число комментариев отзывов.')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            titles = rebuild_ratings()
+            reviews = rebuild_comments_count()
+        self.stdout.write(self.style.SUCCESS(
+            f'Счётчики пересчитаны: {titles} произведений, '
+            f'{reviews} отзывов.'))
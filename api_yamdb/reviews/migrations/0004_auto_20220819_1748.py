@@ -6,7 +6,7 @@ from django.db import migrations
 class Migration(migrations.Migration):
 
     dependencies = [
-        ('reviews', '0003_auto_20220819_1607'),
+        ('reviews', '0002_auto_20220820_0123'),
     ]
 
     operations = [
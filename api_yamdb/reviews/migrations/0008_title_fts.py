@@ -0,0 +1,34 @@
+from django.db import migrations
+
+
+def create_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        'CREATE VIRTUAL TABLE IF NOT EXISTS reviews_title_fts USING fts5('
+        "name, tokenize='unicode61 remove_diacritics 2')"
+    )
+    schema_editor.execute(
+        'INSERT INTO reviews_title_fts (rowid, name) '
+        'SELECT id, name FROM reviews_title'
+    )
+    # reviews.search запоминает на соединении, есть ли таблица.
+    schema_editor.connection._title_fts_enabled = None
+
+
+def drop_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute('DROP TABLE IF EXISTS reviews_title_fts')
+    schema_editor.connection._title_fts_enabled = None
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0007_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts, drop_fts),
+    ]
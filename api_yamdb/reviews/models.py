@@ -1,6 +1,6 @@
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
 
 from reviews.utilites import current_year
 from users.models import User
@@ -73,21 +73,65 @@ class Title(models.Model):
         on_delete=models.SET_NULL,
         null=True,
     )
+    rating_sum = models.PositiveIntegerField(
+        'Сумма оценок', default=0, editable=False)
+    rating_count = models.PositiveIntegerField(
+        'Количество оценок', default=0, editable=False)
+    modified = models.DateTimeField('Дата изменения', auto_now=True)
 
     def __str__(self):
         return self.name
 
+    @property
+    def rating(self):
+        """Средняя оценка по денормализованным счётчикам."""
+        if not self.rating_count:
+            return None
+        return self.rating_sum / self.rating_count
+
+    @property
+    def reviews_count(self):
+        """У каждого отзыва ровно одна оценка, отдельный счётчик
+        отзывов не нужен."""
+        return self.rating_count
+
+    def set_genres(self, genres, created=False):
+        """Записывает жанры одним удалением и одной пачкой вставок
+        по разнице с текущими. Сигналы m2m_changed не отправляются:
+        произведение при этом сохраняется и сбрасывает кеши само."""
+        through = Title.genre.through
+        new_ids = {genre.pk for genre in genres}
+        old_ids = set() if created else set(
+            through.objects.filter(title_id=self.pk)
+            .values_list('genre_id', flat=True))
+        removed, added = old_ids - new_ids, new_ids - old_ids
+        if removed:
+            through.objects.filter(
+                title_id=self.pk, genre_id__in=removed).delete()
+        if added:
+            through.objects.bulk_create(
+                through(title_id=self.pk, genre_id=genre_id)
+                for genre_id in added)
+        getattr(self, '_prefetched_objects_cache', {}).pop('genre', None)
+
     class Meta:
         verbose_name = 'Произведение'
         verbose_name_plural = 'Произведения'
         ordering = ('name',)
         default_related_name = "titles"
+        indexes = [
+            models.Index(fields=('name', 'id'), name='title_name_id_idx'),
+            models.Index(fields=('category', 'name'),
+                         name='title_category_name_idx'),
+            models.Index(fields=('year', 'name'), name='title_year_name_idx'),
+        ]
 
 
 class AbstractModelReviewComments(models.Model):
     """Абстрактная модель для Review и Comments."""
     text = models.CharField(max_length=settings.LIMIT_CHAT)
     pub_date = models.DateTimeField('Дата публикации', auto_now_add=True)
+    modified = models.DateTimeField('Дата изменения', auto_now=True)
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -118,6 +162,26 @@ class Review(AbstractModelReviewComments):
                               message='Максимальное значение рейтинга - 10')
         ],
     )
+    comments_count = models.PositiveIntegerField(
+        'Количество комментариев', default=0, editable=False)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if {'title_id', 'score'} <= set(field_names):
+            instance.remember_rating()
+        return instance
+
+    def remember_rating(self):
+        """Запоминает сохранённые в БД произведение и оценку,
+        чтобы при изменении отзыва поправить рейтинг на разницу."""
+        self._rating_snapshot = (self.title_id, self.score)
+
+    def save(self, *args, **kwargs):
+        # Рейтинг пересчитывается в post_save, он должен попасть
+        # в ту же транзакцию, что и сам отзыв.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
 
     class Meta(AbstractModelReviewComment.Meta):
         verbose_name = 'Отзыв'
@@ -129,6 +193,12 @@ class Review(AbstractModelReviewComments):
                 name='unique_author_title'
             )
         ]
+        indexes = [
+            models.Index(fields=('title', 'pub_date', 'id'),
+                         name='review_title_pub_date_idx'),
+            models.Index(fields=('author', 'pub_date'),
+                         name='review_author_pub_date_idx'),
+        ]
 
 
 class Comments(AbstractModelReviewComments):
@@ -138,7 +208,18 @@ class Comments(AbstractModelReviewComments):
         verbose_name='Отзыв',
     )
 
+    def save(self, *args, **kwargs):
+        # Счётчик комментариев отзыва меняется в post_save.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
     class Meta(AbstractModelReviewComments.Meta):
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
         default_related_name = "comments"
+        indexes = [
+            models.Index(fields=('review', 'pub_date', 'id'),
+                         name='comment_review_pub_date_idx'),
+            models.Index(fields=('author', 'pub_date'),
+                         name='comment_author_pub_date_idx'),
+        ]
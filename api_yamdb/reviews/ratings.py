@@ -0,0 +1,31 @@
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from reviews.models import Review, Title
+
+
+def change_rating(title_id, score, count):
+    """Сдвигает счётчики рейтинга произведения одним UPDATE."""
+    Title.objects.filter(pk=title_id).update(
+        rating_sum=F('rating_sum') + score,
+        rating_count=F('rating_count') + count,
+        modified=timezone.now(),
+    )
+
+
+def rebuild_ratings(titles=None):
+    """Пересчитывает счётчики рейтинга по отзывам с нуля."""
+    if titles is None:
+        titles = Title.objects.all()
+    reviews = (Review.objects.filter(title=OuterRef('pk'))
+               .order_by().values('title'))
+    return titles.update(
+        rating_sum=Coalesce(
+            Subquery(reviews.annotate(total=Sum('score')).values('total')),
+            0, output_field=IntegerField()),
+        rating_count=Coalesce(
+            Subquery(reviews.annotate(total=Count('id')).values('total')),
+            0, output_field=IntegerField()),
+        modified=timezone.now(),
+    )
@@ -0,0 +1,96 @@
+"""Полнотекстовый поиск произведений по названию.
+
+На SQLite используется виртуальная таблица FTS5, которую поддерживают
+в актуальном состоянии сигналы ``Title``. На остальных движках, а также
+если таблица не создана, поиск сводится к прежнему ``icontains``.
+"""
+import re
+
+from django.db import DEFAULT_DB_ALIAS, connections
+
+FTS_TABLE = 'reviews_title_fts'
+RANK_FIELD = 'search_rank'
+
+TOKEN_RE = re.compile(r'\w+')
+
+
+def fts_enabled(using=DEFAULT_DB_ALIAS):
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return False
+    enabled = getattr(connection, '_title_fts_enabled', None)
+    if enabled is None:
+        enabled = FTS_TABLE in connection.introspection.table_names()
+        connection._title_fts_enabled = enabled
+    return enabled
+
+
+def rebuild_index(using=DEFAULT_DB_ALIAS):
+    """Заполняет индекс заново по всем произведениям."""
+    if not fts_enabled(using):
+        return
+    with connections[using].cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, name) '
+            'SELECT id, name FROM reviews_title'
+        )
+
+
+def index_title(title, using=DEFAULT_DB_ALIAS):
+    if not fts_enabled(using):
+        return
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [title.pk])
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, name) VALUES (%s, %s)',
+            [title.pk, title.name]
+        )
+
+
+def index_new_titles(titles, using=DEFAULT_DB_ALIAS):
+    """Добавляет в индекс пачку только что созданных произведений."""
+    if not fts_enabled(using):
+        return
+    rows = [(title.pk, title.name) for title in titles]
+    with connections[using].cursor() as cursor:
+        cursor.executemany(
+            f'DELETE FROM {FTS_TABLE} WHERE rowid = %s',
+            [(pk,) for pk, _ in rows]
+        )
+        cursor.executemany(
+            f'INSERT INTO {FTS_TABLE} (rowid, name) VALUES (%s, %s)',
+            rows
+        )
+
+
+def unindex_title(title, using=DEFAULT_DB_ALIAS):
+    if not fts_enabled(using):
+        return
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [title.pk])
+
+
+def match_expression(value):
+    """Каждое слово запроса ищется как префикс: подходит для поиска
+    по мере набора текста."""
+    return ' '.join(f'"{token}"*' for token in TOKEN_RE.findall(value))
+
+
+def search_titles(queryset, value):
+    """Фильтрует произведения по названию и добавляет ``search_rank``
+    (меньше — релевантнее), если доступен FTS5."""
+    expression = match_expression(value)
+    if not fts_enabled(queryset.db) or not expression:
+        return queryset.filter(name__icontains=value)
+    return queryset.extra(
+        select={RANK_FIELD: f'{FTS_TABLE}.rank'},
+        tables=[FTS_TABLE],
+        where=[
+            f'{FTS_TABLE}.rowid = reviews_title.id',
+            f'{FTS_TABLE} MATCH %s',
+        ],
+        params=[expression],
+    )
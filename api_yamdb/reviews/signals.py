@@ -0,0 +1,100 @@
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from reviews.counters import change_comments_count
+from reviews.models import Category, Comments, Genre, Review, Title
+from reviews.ratings import change_rating, rebuild_ratings
+from reviews.search import index_title, unindex_title
+from users.models import User
+
+
+@receiver(post_save, sender=Review)
+def review_saved(sender, instance, created, **kwargs):
+    snapshot = getattr(instance, '_rating_snapshot', None)
+    if created:
+        change_rating(instance.title_id, instance.score, 1)
+    elif snapshot is None:
+        # Отзыв сохранён не из загруженного экземпляра,
+        # прежняя оценка неизвестна.
+        rebuild_ratings(Title.objects.filter(pk=instance.title_id))
+    elif snapshot[0] == instance.title_id:
+        change_rating(instance.title_id, instance.score - snapshot[1], 0)
+    else:
+        change_rating(snapshot[0], -snapshot[1], -1)
+        change_rating(instance.title_id, instance.score, 1)
+    instance.remember_rating()
+
+
+@receiver(post_delete, sender=Review)
+def review_deleted(sender, instance, **kwargs):
+    title_id, score = getattr(
+        instance, '_rating_snapshot', (instance.title_id, instance.score))
+    change_rating(title_id, -score, -1)
+
+
+@receiver(post_save, sender=Comments)
+def comment_saved(sender, instance, created, **kwargs):
+    if created:
+        change_comments_count(instance.review_id, 1)
+
+
+@receiver(post_delete, sender=Comments)
+def comment_deleted(sender, instance, **kwargs):
+    change_comments_count(instance.review_id, -1)
+
+
+@receiver(post_save, sender=Title)
+def title_saved(sender, instance, using, **kwargs):
+    index_title(instance, using)
+
+
+@receiver(post_delete, sender=Title)
+def title_deleted(sender, instance, using, **kwargs):
+    unindex_title(instance, using)
+
+
+def touch_titles(titles):
+    """Обновляет дату изменения произведений, в ответ которых
+    вложены изменённые категория или жанр."""
+    titles.update(modified=timezone.now())
+
+
+@receiver(post_save, sender=Category)
+@receiver(pre_delete, sender=Category)
+def category_changed(sender, instance, **kwargs):
+    touch_titles(Title.objects.filter(category=instance))
+
+
+@receiver(post_save, sender=Genre)
+@receiver(pre_delete, sender=Genre)
+def genre_changed(sender, instance, **kwargs):
+    touch_titles(Title.objects.filter(genre=instance))
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def title_genres_changed(sender, instance, action, reverse, pk_set,
+                         **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if not reverse:
+        touch_titles(Title.objects.filter(pk=instance.pk))
+    elif pk_set:
+        touch_titles(Title.objects.filter(pk__in=pk_set))
+    else:
+        touch_titles(Title.objects.filter(genre=instance))
+
+
+@receiver(post_save, sender=User)
+def author_saved(sender, instance, created, update_fields, **kwargs):
+    """Имя автора выводится в отзывах и комментариях: при его смене
+    обновляется их дата изменения, а с ней ETag и Last-Modified."""
+    if created or update_fields is not None and (
+            'username' not in update_fields):
+        return
+    if getattr(instance, '_username_snapshot', None) != instance.username:
+        now = timezone.now()
+        Review.objects.filter(author=instance).update(modified=now)
+        Comments.objects.filter(author=instance).update(modified=now)
+    instance.remember_username()
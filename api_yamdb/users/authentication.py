@@ -0,0 +1,60 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+
+from api.metrics import cache_requests
+from users.models import User
+
+# Всё, что нужно аутентификации и проверкам прав; остальные поля
+# остаются отложенными и подгрузятся при обращении.
+CACHED_FIELDS = ('id', 'username', 'role', 'is_active', 'is_staff',
+                 'is_superuser')
+
+
+def get_cache():
+    return caches[settings.AUTH_USER_CACHE_ALIAS]
+
+
+def user_cache_key(user_id):
+    return f'auth-user:{user_id}'
+
+
+def forget_user(user_id):
+    get_cache().delete(user_cache_key(user_id))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWT аутентификация без запроса пользователя в БД
+    на каждый запрос: состояние пользователя живёт в кеше
+    ``AUTH_USER_CACHE_TIMEOUT`` секунд."""
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None:
+            return super().get_user(validated_token)
+        key = user_cache_key(user_id)
+        state = get_cache().get(key)
+        cache_requests.inc(cache='auth-user',
+                           result='miss' if state is None else 'hit')
+        if state is None:
+            user = super().get_user(validated_token)
+            get_cache().set(
+                key,
+                {field: getattr(user, field) for field in CACHED_FIELDS},
+                settings.AUTH_USER_CACHE_TIMEOUT
+            )
+            return user
+        if not state['is_active']:
+            raise AuthenticationFailed(
+                _('User is inactive'), code='user_inactive')
+        fields = [field for field in User._meta.concrete_fields
+                  if field.attname in state]
+        return User.from_db(
+            DEFAULT_DB_ALIAS,
+            [field.attname for field in fields],
+            [state[field.attname] for field in fields],
+        )
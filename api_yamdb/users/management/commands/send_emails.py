@@ -0,0 +1,42 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from users.outbox import claim, save_results, send
+
+
+class Command(BaseCommand):
+    help = 'Отправляет письма из очереди OutgoingEmail.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4,
+                            help='Число потоков, каждый со своим '
+                                 'соединением с почтовым сервером.')
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--interval', type=float, default=5,
+                            help='Пауза в секундах, когда очередь пуста.')
+        parser.add_argument('--once', action='store_true',
+                            help='Разобрать очередь и завершиться.')
+
+    def handle(self, *args, **options):
+        workers = options['workers']
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            while True:
+                emails = claim(options['batch_size'])
+                if emails:
+                    self.deliver(pool, workers, emails)
+                    continue
+                if options['once']:
+                    return
+                time.sleep(options['interval'])
+
+    def deliver(self, pool, workers, emails):
+        chunks = [emails[index::workers] for index in range(workers)]
+        results = {}
+        for chunk_results in pool.map(send, filter(None, chunks)):
+            results.update(chunk_results)
+        save_results(emails, results)
+        failed = sum(error is not None for error in results.values())
+        self.stdout.write(
+            f'Отправлено {len(emails) - failed}, ошибок {failed}')
@@ -0,0 +1,28 @@
+from django.db.models import Count, Min
+from django.utils import timezone
+
+from api.metrics import register_collector
+from users.models import OutgoingEmail
+
+
+@register_collector
+def outbox_backlog():
+    emails = dict(
+        OutgoingEmail.objects.values_list('status')
+        .annotate(total=Count('pk')).order_by()
+    )
+    oldest = OutgoingEmail.objects.filter(
+        status=OutgoingEmail.PENDING).aggregate(oldest=Min('created'))
+    age = (
+        (timezone.now() - oldest['oldest']).total_seconds()
+        if oldest['oldest'] else 0.0
+    )
+    return (
+        ('api_email_outbox_emails',
+         'Письма в очереди по статусам.',
+         [((('status', status),), emails.get(status, 0))
+          for status, _ in OutgoingEmail.CHOICES_STATUS]),
+        ('api_email_outbox_oldest_pending_seconds',
+         'Возраст самого старого неотправленного письма.',
+         [((), age)]),
+    )
@@ -1,6 +1,7 @@
 from django.conf import settings
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 from users.validators import UsernameRegexValidator, username_me
@@ -64,3 +65,57 @@ class User(AbstractUser):
 
     def __str__(self):
         return self.username
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if 'username' in field_names:
+            instance.remember_username()
+        return instance
+
+    def remember_username(self):
+        """Запоминает сохранённое в БД имя: оно выводится в отзывах
+        и комментариях, и при его смене их ETag должен поменяться."""
+        self._username_snapshot = self.username
+
+
+class OutgoingEmail(models.Model):
+    """Письмо в очереди на отправку (transactional outbox)."""
+    PENDING = 'pending'
+    SENT = 'sent'
+    FAILED = 'failed'
+
+    CHOICES_STATUS = (
+        (PENDING, 'В очереди'),
+        (SENT, 'Отправлено'),
+        (FAILED, 'Не отправлено'),
+    )
+    subject = models.CharField('Тема', max_length=settings.LIMIT_CHAT)
+    body = models.TextField('Текст')
+    from_email = models.EmailField(
+        'Отправитель', max_length=settings.LIMIT_EMAIL)
+    to = models.TextField('Получатели', help_text='По одному на строке.')
+    status = models.CharField(
+        'Статус',
+        default=PENDING,
+        max_length=max(len(status) for status, _ in CHOICES_STATUS),
+        choices=CHOICES_STATUS)
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+    next_attempt = models.DateTimeField(
+        'Следующая попытка', default=timezone.now)
+    lock = models.CharField('Захвачено', max_length=32, blank=True)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    created = models.DateTimeField('Дата создания', auto_now_add=True)
+    sent = models.DateTimeField('Дата отправки', null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Исходящее письмо'
+        verbose_name_plural = 'Исходящие письма'
+        ordering = ('id',)
+        indexes = [
+            models.Index(fields=('status', 'next_attempt'),
+                         name='outbox_status_next_idx'),
+        ]
+
+    def __str__(self):
+        return self.subject
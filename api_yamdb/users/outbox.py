@@ -0,0 +1,116 @@
+"""Очередь исходящих писем.
+
+Вьюха только записывает письмо в таблицу ``OutgoingEmail`` в своей
+транзакции; доставкой занимается команда ``send_emails``. Если
+``EMAIL_OUTBOX_SYNC`` включён (локальная разработка и тесты), письмо
+отправляется сразу после коммита тем же путём, что и в воркере:
+захват, отправка, сохранение результата. Захваченное письмо воркер
+повторно не отправит.
+"""
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from users.models import OutgoingEmail
+
+
+def queue_mail(subject, message, from_email, recipient_list):
+    email = OutgoingEmail.objects.create(
+        subject=subject,
+        body=message,
+        from_email=from_email,
+        to='\n'.join(recipient_list),
+    )
+    if settings.EMAIL_OUTBOX_SYNC:
+        transaction.on_commit(lambda: deliver(claim(1, pks=[email.pk])))
+    return email
+
+
+def claim(batch_size, pks=None):
+    """Захватывает пачку писем, которым пора уходить.
+
+    Захват продлевает ``next_attempt`` на время аренды: если воркер
+    упадёт, письма снова станут доступны другим воркерам.
+    """
+    now = timezone.now()
+    due = OutgoingEmail.objects.filter(
+        status=OutgoingEmail.PENDING, next_attempt__lte=now)
+    if pks is not None:
+        due = due.filter(pk__in=pks)
+    due = list(
+        due.order_by('next_attempt').values_list('pk', flat=True)[:batch_size]
+    )
+    if not due:
+        return []
+    lock = uuid.uuid4().hex
+    OutgoingEmail.objects.filter(
+        pk__in=due, status=OutgoingEmail.PENDING, next_attempt__lte=now
+    ).update(
+        lock=lock,
+        next_attempt=now + timedelta(seconds=settings.EMAIL_OUTBOX_LEASE),
+    )
+    return list(OutgoingEmail.objects.filter(lock=lock))
+
+
+def send(emails):
+    """Отправляет письма через одно соединение с почтовым сервером.
+
+    Возвращает словарь ``{pk: текст ошибки или None}``. Работает только
+    с почтой, поэтому её можно вызывать из пула потоков.
+    """
+    results = {}
+    connection = get_connection()
+    try:
+        connection.open()
+    except Exception as error:
+        return {email.pk: repr(error) for email in emails}
+    try:
+        for email in emails:
+            message = EmailMessage(
+                email.subject, email.body, email.from_email,
+                email.to.splitlines(), connection=connection)
+            try:
+                message.send()
+            except Exception as error:
+                results[email.pk] = repr(error)
+            else:
+                results[email.pk] = None
+    finally:
+        connection.close()
+    return results
+
+
+def backoff(attempts):
+    return timedelta(
+        seconds=settings.EMAIL_OUTBOX_BACKOFF * 2 ** (attempts - 1))
+
+
+def save_results(emails, results):
+    now = timezone.now()
+    for email in emails:
+        error = results[email.pk]
+        email.attempts += 1
+        email.lock = ''
+        if error is None:
+            email.status = OutgoingEmail.SENT
+            email.sent = now
+            email.last_error = ''
+        else:
+            email.last_error = error
+            if email.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+                email.status = OutgoingEmail.FAILED
+            else:
+                email.next_attempt = now + backoff(email.attempts)
+    OutgoingEmail.objects.bulk_update(
+        emails,
+        ('status', 'attempts', 'next_attempt', 'lock', 'last_error', 'sent')
+    )
+
+
+def deliver(emails):
+    if emails:
+        save_results(emails, send(emails))
@@ -0,0 +1,200 @@
+"""Нагрузка на чтение каталога медленными клиентами: синхронный WSGI
+против ASGI (``api.asgi.ASGIHandler``).
+
+Запуск из корня репозитория (для ASGI нужен ``uvicorn``)::
+
+    python benchmarks/asgi_load.py [секунд] [клиентов] [задержка, с]
+
+WSGI-сервер обслуживает соединения пулом из ``ASGI_READ_THREADS``
+потоков, как gunicorn с воркером gthread. Каждый клиент отправляет
+заголовки запроса с задержкой, имитируя медленную сеть.
+"""
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'api_yamdb'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
+
+import django  # noqa: E402
+from django.conf import settings  # noqa: E402
+
+HOST = '127.0.0.1'
+PORT = 8765
+TITLES = 200
+PATHS = ('/api/v1/titles/', '/api/v1/titles/{id}/',
+         '/api/v1/titles/{id}/reviews/')
+
+
+def setup(path):
+    settings.DATABASES['default']['NAME'] = path
+    django.setup()
+
+
+def seed():
+    from django.core.management import call_command
+    call_command('migrate', verbosity=0)
+
+    from reviews.models import Review, Title
+    from reviews.ratings import rebuild_ratings
+    from users.models import User
+
+    Title.objects.bulk_create(
+        Title(name=f'Произведение {number}', year=2000)
+        for number in range(TITLES)
+    )
+    User.objects.bulk_create(
+        User(username=f'reader{number}', email=f'reader{number}@yamdb.fake')
+        for number in range(5)
+    )
+    authors = list(User.objects.all())
+    Review.objects.bulk_create(
+        Review(text='Отзыв', score=5, author=author, title=title)
+        for title in Title.objects.all() for author in authors
+    )
+    rebuild_ratings()
+    return list(Title.objects.values_list('id', flat=True))
+
+
+class QuietHandler(WSGIRequestHandler):
+
+    def log_message(self, *args):
+        pass
+
+
+class PoolWSGIServer(WSGIServer):
+    request_queue_size = 2048
+
+    def __init__(self, *args, threads, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pool = ThreadPoolExecutor(threads)
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self.process_request_thread, request, client_address)
+
+    def process_request_thread(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+
+def serve(mode):
+    from django.core.wsgi import get_wsgi_application
+
+    wsgi_application = get_wsgi_application()
+    if mode == 'wsgi':
+        server = PoolWSGIServer((HOST, PORT), QuietHandler,
+                                threads=settings.ASGI_READ_THREADS)
+        server.set_app(wsgi_application)
+        server.serve_forever()
+    else:
+        import uvicorn
+
+        from api.asgi import ASGIHandler
+        uvicorn.run(ASGIHandler(wsgi_application), host=HOST, port=PORT,
+                    log_level='warning', backlog=2048)
+
+
+async def fetch(path, delay):
+    started = time.perf_counter()
+    reader, writer = await asyncio.open_connection(HOST, PORT)
+    try:
+        writer.write(f'GET {path} HTTP/1.1\r\nHost: {HOST}\r\n'
+                     'Connection: close\r\n'.encode())
+        await writer.drain()
+        await asyncio.sleep(delay)
+        writer.write(b'\r\n')
+        await writer.drain()
+        data = await reader.read()
+    finally:
+        writer.close()
+    return int(data.split(b' ', 2)[1]), time.perf_counter() - started
+
+
+async def client(number, ids, delay, deadline, latencies, errors):
+    step = number
+    while time.perf_counter() < deadline:
+        path = PATHS[step % len(PATHS)].format(id=ids[step % len(ids)])
+        step += 1
+        try:
+            status, latency = await fetch(path, delay)
+        except OSError:
+            errors.append(None)
+            continue
+        if status == 200:
+            latencies.append(latency)
+        else:
+            errors.append(status)
+
+
+async def load(ids, seconds, clients, delay):
+    latencies, errors = [], []
+    deadline = time.perf_counter() + seconds
+    await asyncio.gather(*(
+        client(number, ids, delay, deadline, latencies, errors)
+        for number in range(clients)
+    ))
+    return latencies, errors
+
+
+def wait_for_server(process):
+    for _ in range(100):
+        if process.poll() is not None:
+            raise RuntimeError('Сервер не запустился')
+        try:
+            socket.create_connection((HOST, PORT), timeout=0.1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError('Сервер не отвечает')
+
+
+def main():
+    if len(sys.argv) == 4 and sys.argv[1] == 'serve':
+        setup(sys.argv[3])
+        return serve(sys.argv[2])
+    seconds, clients, delay = 10, 300, 0.5
+    if len(sys.argv) > 1:
+        seconds = int(sys.argv[1])
+    if len(sys.argv) > 2:
+        clients = int(sys.argv[2])
+    if len(sys.argv) > 3:
+        delay = float(sys.argv[3])
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'bench.sqlite3')
+        setup(path)
+        ids = seed()
+        print(f'{clients} клиентов, задержка {delay * 1000:.0f} мс, '
+              f'{seconds} с')
+        print(f'{"сервер":<8}{"запросов/с":>12}{"p50, мс":>10}'
+              f'{"p99, мс":>10}{"ошибок":>8}')
+        for mode in ('wsgi', 'asgi'):
+            process = subprocess.Popen(
+                [sys.executable, __file__, 'serve', mode, path])
+            try:
+                wait_for_server(process)
+                latencies, errors = asyncio.run(
+                    load(ids, seconds, clients, delay))
+            finally:
+                process.terminate()
+                process.wait()
+            latencies.sort()
+            p50 = statistics.median(latencies) * 1000 if latencies else 0
+            p99 = (latencies[int(len(latencies) * 0.99)] * 1000
+                   if latencies else 0)
+            print(f'{mode:<8}{len(latencies) / seconds:>12.0f}'
+                  f'{p50:>10.0f}{p99:>10.0f}{len(errors):>8}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""Сравнение рендеринга страницы из 1000 произведений:
+``JSONRenderer`` (stdlib json) против ``FastJSONRenderer`` (orjson).
+
+Запуск из корня репозитория::
+
+    python benchmarks/json_render.py [количество произведений]
+
+База создаётся во временном файле, рабочая ``db.sqlite3`` не трогается.
+"""
+import os
+import sys
+from io import BytesIO
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'api_yamdb'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
+
+import django  # noqa: E402
+from django.conf import settings  # noqa: E402
+
+GENRES = ('horror', 'comedy', 'drama', 'thriller', 'fantasy')
+REPEAT = 50
+
+
+def setup(path):
+    settings.DATABASES['default']['NAME'] = path
+    django.setup()
+    from django.core.management import call_command
+    call_command('migrate', verbosity=0)
+
+
+def page_data(amount):
+    from api.serializers import TitleSerializer
+    from reviews.models import Category, Genre, Title
+
+    category = Category.objects.create(name='Фильмы', slug='films')
+    Genre.objects.bulk_create(
+        Genre(name=f'Жанр «{slug}»', slug=slug) for slug in GENRES)
+    genres = list(Genre.objects.all())
+    Title.objects.bulk_create(
+        Title(name=f'Произведение {number}', year=2000, category=category,
+              description='Описание произведения ' * 5,
+              rating_sum=number % 50, rating_count=number % 7)
+        for number in range(amount)
+    )
+    through = Title.genre.through
+    through.objects.bulk_create(
+        through(title_id=title_id, genre_id=genre.pk)
+        for title_id in Title.objects.values_list('pk', flat=True)
+        for genre in genres[:3]
+    )
+    titles = Title.objects.select_related('category').prefetch_related(
+        'genre')
+    return {'count': amount, 'next': None, 'previous': None,
+            'results': TitleSerializer(titles, many=True).data}
+
+
+def measure(render, data):
+    started = time.perf_counter()
+    for _ in range(REPEAT):
+        body = render(data)
+    return (time.perf_counter() - started) / REPEAT * 1000, body
+
+
+def main():
+    amount = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    with tempfile.TemporaryDirectory() as directory:
+        setup(os.path.join(directory, 'bench.sqlite3'))
+        data = page_data(amount)
+
+        from rest_framework.parsers import JSONParser
+        from rest_framework.renderers import JSONRenderer
+
+        from api.parsers import FastJSONParser, orjson
+        from api.renderers import FastJSONRenderer
+
+        if orjson is None:
+            print('orjson не установлен, FastJSONRenderer работает на '
+                  'stdlib json')
+        stdlib_ms, expected = measure(JSONRenderer().render, data)
+        fast_ms, body = measure(FastJSONRenderer().render, data)
+        assert body == expected, 'Ответы рендереров различаются'
+        print(f'{amount} произведений, {len(body)} байт')
+        print(f'{"":<12}{"stdlib, мс":>12}{"orjson, мс":>12}')
+        print(f'{"рендеринг":<12}{stdlib_ms:>12.2f}{fast_ms:>12.2f}')
+
+        stdlib_ms, _ = measure(
+            lambda body: JSONParser().parse(BytesIO(body)), body)
+        fast_ms, _ = measure(
+            lambda body: FastJSONParser().parse(BytesIO(body)), body)
+        print(f'{"разбор":<12}{stdlib_ms:>12.2f}{fast_ms:>12.2f}')
+
+
+if __name__ == '__main__':
+    main()
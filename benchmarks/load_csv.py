@@ -0,0 +1,70 @@
+"""Скорость ``load_csv`` на синтетических файлах.
+
+Запуск из корня репозитория::
+
+    python benchmarks/load_csv.py [отзывов]
+
+Создаёт временную базу и каталог с CSV: сто пользователей, тысячу
+произведений и заданное число отзывов (по умолчанию 200 000), затем
+загружает их командой ``load_csv`` и печатает её отчёт по файлам.
+"""
+import csv
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'api_yamdb'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
+
+USERS = 100
+TITLES = 1000
+
+
+def write(path, header, rows):
+    with open(path, 'w', encoding='utf-8', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+
+def make_files(directory, reviews):
+    write(os.path.join(directory, 'users.csv'),
+          ('id', 'password', 'last_login', 'is_superuser', 'username',
+           'first_name', 'last_name', 'is_staff', 'is_active',
+           'date_joined', 'email', 'bio', 'role'),
+          ((number, '', '', '', f'user{number}', '', '', '', '', '',
+            f'user{number}@yamdb.fake', '', 'user')
+           for number in range(1, USERS + 1)))
+    write(os.path.join(directory, 'titles.csv'),
+          ('id', 'name', 'year', 'category', 'description'),
+          ((number, f'Произведение {number}', 2000, '', '')
+           for number in range(1, TITLES + 1)))
+    # Пара (автор, произведение) уникальна: id отзыва раскладывается
+    # на автора и произведение.
+    write(os.path.join(directory, 'review.csv'),
+          ('id', 'text', 'pub_date', 'score', 'author_id', 'title_id'),
+          ((number, 'Текст отзыва', '2020-01-01T00:00:00Z', number % 10 + 1,
+            number % USERS + 1, number // USERS % TITLES + 1)
+           for number in range(reviews)))
+
+
+def main():
+    reviews = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    if reviews > USERS * TITLES:
+        sys.exit(f'Не больше {USERS * TITLES} отзывов')
+    with tempfile.TemporaryDirectory() as directory:
+        import django
+        from django.conf import settings
+
+        settings.DATABASES['default']['NAME'] = os.path.join(
+            directory, 'bench.sqlite3')
+        django.setup()
+        from django.core.management import call_command
+
+        call_command('migrate', verbosity=0)
+        make_files(directory, reviews)
+        call_command('load_csv', path=directory)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+"""Параллельные чтение и запись в SQLite: профиль development
+(настройки по умолчанию) против production (WAL, прагмы, постоянные
+соединения).
+
+Запуск из корня репозитория::
+
+    python benchmarks/sqlite_concurrency.py [секунд] [читателей] [писателей]
+
+Каждый профиль запускается в отдельном процессе со своей временной
+базой. Каждая операция оформлена как запрос Django: соединения
+закрываются или переиспользуются через ``close_old_connections``.
+"""
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'api_yamdb'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
+
+PROFILES = ('development', 'production')
+TITLES = 5000
+PAGE_SIZE = 5
+
+
+def setup(path):
+    import django
+    from django.conf import settings
+
+    settings.DATABASES['default']['NAME'] = path
+    django.setup()
+    from django.core.management import call_command
+    call_command('migrate', verbosity=0)
+
+    from reviews.models import Title
+    from reviews.search import rebuild_index
+    Title.objects.bulk_create(
+        Title(name=f'Произведение {number}', year=2000)
+        for number in range(TITLES)
+    )
+    rebuild_index()
+
+
+def as_request(operation, stats, name):
+    from django.db import OperationalError, close_old_connections
+
+    close_old_connections()
+    try:
+        operation()
+    except OperationalError:
+        stats[f'{name}_errors'] += 1
+    else:
+        stats[name] += 1
+    finally:
+        close_old_connections()
+
+
+def read():
+    from reviews.models import Title
+
+    offset = random.randrange(TITLES - PAGE_SIZE)
+    Title.objects.count()
+    list(Title.objects.select_related('category')
+         .order_by('name', 'id')[offset:offset + PAGE_SIZE])
+
+
+def write():
+    from reviews.models import Title
+
+    Title.objects.create(name='Новое произведение', year=2000)
+
+
+def worker(operation, name, stats, lock, deadline):
+    local = Counter()
+    while time.perf_counter() < deadline:
+        as_request(operation, local, name)
+    from django.db import connection
+    connection.close()
+    with lock:
+        stats.update(local)
+
+
+def run(seconds, readers, writers):
+    from django.conf import settings
+
+    stats, lock = Counter(), threading.Lock()
+    deadline = time.perf_counter() + seconds
+    threads = [
+        threading.Thread(target=worker,
+                         args=(read, 'reads', stats, lock, deadline))
+        for _ in range(readers)
+    ] + [
+        threading.Thread(target=worker,
+                         args=(write, 'writes', stats, lock, deadline))
+        for _ in range(writers)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    print(f'{settings.DB_PROFILE:<12}'
+          f'{stats["reads"] / seconds:>12.0f}'
+          f'{stats["writes"] / seconds:>12.0f}'
+          f'{stats["reads_errors"] + stats["writes_errors"]:>10}')
+
+
+def main():
+    args = sys.argv[1:] or ['5', '8', '2']
+    if os.environ.get('BENCHMARK_CHILD'):
+        seconds, readers, writers = (int(arg) for arg in args)
+        with tempfile.TemporaryDirectory() as directory:
+            setup(os.path.join(directory, 'bench.sqlite3'))
+            run(seconds, readers, writers)
+        return
+    print(f'{"профиль":<12}{"чтений/с":>12}{"записей/с":>12}'
+          f'{"ошибок":>10}')
+    for profile in PROFILES:
+        env = dict(os.environ, DB_PROFILE=profile, BENCHMARK_CHILD='1')
+        subprocess.run([sys.executable, __file__, *args], env=env, check=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""Сравнение поиска произведений: FTS5 против ``icontains``.
+
+Запуск из корня репозитория::
+
+    python benchmarks/title_search.py [количество произведений]
+
+База создаётся во временном файле, рабочая ``db.sqlite3`` не трогается.
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'api_yamdb'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
+
+import django  # noqa: E402
+from django.conf import settings  # noqa: E402
+
+WORDS = ('поворот', 'туда', 'проект', 'дорога', 'дом', 'город', 'ночь',
+         'война', 'мир', 'море', 'небо', 'сад', 'зима', 'лето', 'огонь',
+         'тень', 'путь', 'берег', 'остров', 'звезда')
+QUERIES = ('дор', 'зима', 'остров звезд', 'город ночь', 'абракадабра')
+BATCH_SIZE = 10000
+REPEAT = 5
+
+
+def setup(path):
+    settings.DATABASES['default']['NAME'] = path
+    django.setup()
+    from django.core.management import call_command
+    call_command('migrate', verbosity=0)
+
+
+def generate(amount):
+    from reviews.models import Title
+    from reviews.search import rebuild_index
+
+    random.seed(0)
+    batch = []
+    for number in range(amount):
+        name = ' '.join(random.sample(WORDS, 3)) + f' {number}'
+        batch.append(Title(name=name, year=2000))
+        if len(batch) == BATCH_SIZE:
+            Title.objects.bulk_create(batch)
+            batch = []
+    Title.objects.bulk_create(batch)
+    rebuild_index()
+
+
+def measure(queryset):
+    started = time.perf_counter()
+    for _ in range(REPEAT):
+        count = queryset.count()
+        list(queryset.order_by()[:5])
+    return (time.perf_counter() - started) / REPEAT * 1000, count
+
+
+def main():
+    amount = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    with tempfile.TemporaryDirectory() as directory:
+        setup(os.path.join(directory, 'bench.sqlite3'))
+        started = time.perf_counter()
+        generate(amount)
+        elapsed = time.perf_counter() - started
+        print(f'{amount} произведений за {elapsed:.1f} с')
+
+        from reviews.models import Title
+        from reviews.search import search_titles
+        print(f'{"запрос":<16}{"icontains, мс":>16}{"FTS5, мс":>12}'
+              f'{"найдено":>12}')
+        for query in QUERIES:
+            like_ms, _ = measure(Title.objects.filter(name__icontains=query))
+            fts_ms, found = measure(search_titles(Title.objects.all(), query))
+            print(f'{query:<16}{like_ms:>16.1f}{fts_ms:>12.1f}{found:>12}')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,8 @@
 import os
 import sys
 
+import pytest
+
 from django.utils.version import get_version
 
 root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -34,3 +36,21 @@ assert get_version() < '3.0.0', 'Пожалуйста, используйте в
 pytest_plugins = [
     'tests.fixtures.fixture_user',
 ]
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    from django.core.cache import caches
+
+    from api.fields import clear_slug_caches
+
+    for cache in caches.all():
+        cache.clear()
+    clear_slug_caches()
+
+
+@pytest.fixture(autouse=True)
+def email_outbox_sync(settings):
+    # Тесты регистрации проверяют письмо сразу после запроса,
+    # без воркера send_emails.
+    settings.EMAIL_OUTBOX_SYNC = True
@@ -0,0 +1,81 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from .common import auth_client, create_reviews, create_titles
+
+
+class Test08Rating:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_rating_counters(self, admin_client, admin):
+        from reviews.models import Review, Title
+
+        reviews, titles, _, _ = create_reviews(admin_client, admin)
+        title = Title.objects.get(id=titles[0]['id'])
+        assert (title.rating_sum, title.rating_count) == (12, 3), (
+            'Проверьте, что при создании отзыва обновляются '
+            '`rating_sum` и `rating_count` произведения'
+        )
+        review = Review.objects.get(id=reviews[0]['id'])
+        review.score = 8
+        review.save()
+        title.refresh_from_db()
+        assert (title.rating_sum, title.rating_count) == (15, 3), (
+            'Проверьте, что при изменении оценки рейтинг сдвигается на разницу'
+        )
+        review.delete()
+        title.refresh_from_db()
+        assert (title.rating_sum, title.rating_count) == (7, 2), (
+            'Проверьте, что при удалении отзыва рейтинг пересчитывается'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_rebuild_ratings(self, admin_client, admin):
+        from reviews.models import Title
+
+        _, titles, _, _ = create_reviews(admin_client, admin)
+        Title.objects.update(rating_sum=0, rating_count=0)
+        call_command('rebuild_ratings', stdout=StringIO())
+        response = admin_client.get(f'/api/v1/titles/{titles[0]["id"]}/')
+        assert response.json().get('rating') == 4, (
+            'Проверьте, что команда `rebuild_ratings` восстанавливает рейтинг'
+        )
+        response = admin_client.get(f'/api/v1/titles/{titles[1]["id"]}/')
+        assert response.json().get('rating') is None, (
+            'Проверьте, что у произведения без отзывов `rating` равен `None`'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_ordering_by_rating(self, admin_client, user):
+        titles, _, _ = create_titles(admin_client)
+        url = '/api/v1/titles/{}/reviews/'
+        admin_client.post(url.format(titles[0]['id']),
+                          data={'text': 'Отлично', 'score': 9})
+        admin_client.post(url.format(titles[1]['id']),
+                          data={'text': 'Плохо', 'score': 2})
+        auth_client(user).post(url.format(titles[1]['id']),
+                               data={'text': 'Так себе', 'score': 2})
+
+        def ordered(ordering):
+            response = admin_client.get(
+                '/api/v1/titles/', {'ordering': ordering})
+            assert response.status_code == 200
+            return [(title['name'], title['rating'])
+                    for title in response.json()['results']]
+
+        assert ordered('rating') == [
+            (titles[1]['name'], 2), (titles[0]['name'], 9)], (
+            'Проверьте, что `?ordering=rating` сортирует произведения '
+            'по возрастанию рейтинга'
+        )
+        assert ordered('-rating') == [
+            (titles[0]['name'], 9), (titles[1]['name'], 2)], (
+            'Проверьте, что `?ordering=-rating` сортирует произведения '
+            'по убыванию рейтинга'
+        )
+        assert [name for name, _ in ordered('-reviews_count')] == [
+            titles[1]['name'], titles[0]['name']], (
+            'Проверьте, что произведения сортируются по числу отзывов'
+        )
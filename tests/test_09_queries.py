@@ -0,0 +1,249 @@
+import os
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .common import (auth_client, create_categories, create_genre,
+                     create_reviews)
+
+
+def count_queries(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200, (
+        f'Проверьте, что при GET запросе `{url}` возвращается статус 200'
+    )
+    return len(context)
+
+
+def create_many_titles(admin_client, amount, start=0):
+    ids = []
+    for number in range(start, start + amount):
+        data = {'name': f'Произведение {number}', 'year': 2000,
+                'genre': ['horror', 'comedy', 'drama'],
+                'category': 'films' if number % 2 else 'books'}
+        ids.append(admin_client.post('/api/v1/titles/', data=data).json()['id'])
+    return ids
+
+
+class Test09Queries:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_titles_list_queries(self, client, admin_client):
+        create_genre(admin_client)
+        create_categories(admin_client)
+        create_many_titles(admin_client, 1)
+        one_title = count_queries(client, '/api/v1/titles/')
+        create_many_titles(admin_client, 4, start=1)
+        full_page = count_queries(client, '/api/v1/titles/')
+        assert one_title == full_page, (
+            'Проверьте, что количество запросов к БД при GET запросе `/api/v1/titles/` '
+            'не зависит от количества произведений на странице'
+        )
+        assert full_page <= 3, (
+            'Проверьте, что при GET запросе `/api/v1/titles/` категории загружаются через '
+            '`select_related`, а жанры через `prefetch_related`'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_title_detail_queries(self, client, admin_client):
+        create_genre(admin_client)
+        create_categories(admin_client)
+        title_id = create_many_titles(admin_client, 1)[0]
+        assert count_queries(client, f'/api/v1/titles/{title_id}/') <= 3, (
+            'Проверьте, что при GET запросе `/api/v1/titles/{title_id}/` '
+            'произведение загружается вместе с категорией и жанрами за 2 запроса '
+            'после проверки ETag'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_review_create_queries(self, admin_client, admin):
+        reviews, titles, user, moderator = create_reviews(admin_client, admin)
+        url = f'/api/v1/titles/{titles[1]["id"]}/reviews/'
+        budget = []
+        for client in (auth_client(user), auth_client(moderator)):
+            with CaptureQueriesContext(connection) as context:
+                response = client.post(url, data={'text': 'Отзыв', 'score': 5})
+            assert response.status_code == 201
+            budget.append(len(context))
+        assert budget[0] == budget[1] <= 4, (
+            'Проверьте, что при POST запросе `/api/v1/titles/{title_id}/reviews/` '
+            'произведение загружается один раз, а отзыв вставляется без '
+            'предварительной проверки `exists()`'
+        )
+        titles_selects = [query for query in context
+                          if query['sql'].startswith('SELECT')
+                          and 'FROM "reviews_title"' in query['sql']]
+        assert len(titles_selects) == 1, (
+            'Проверьте, что произведение загружается один раз на запрос'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_comments_page_queries(self, client, admin_client, admin,
+                                      monkeypatch):
+        from api.pagination import PubDatePagination
+        from reviews.counters import rebuild_comments_count
+        from reviews.models import Comments
+        from users.models import User
+
+        reviews, titles, _, _ = create_reviews(admin_client, admin)
+        User.objects.bulk_create(
+            User(username=f'commenter{number}',
+                 email=f'commenter{number}@yamdb.fake')
+            for number in range(100)
+        )
+        authors = User.objects.filter(username__startswith='commenter')
+        Comments.objects.bulk_create(
+            Comments(text=f'Комментарий {number}', author=author,
+                     review_id=reviews[0]['id'])
+            for number, author in enumerate(authors)
+        )
+        rebuild_comments_count()
+        monkeypatch.setattr(PubDatePagination, 'page_size', 100)
+        url = (f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+               f'{reviews[0]["id"]}/comments/')
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        assert len(response.json()['results']) == 100
+        assert len(context) <= 4, (
+            'Проверьте, что при GET запросе `/api/v1/titles/{title_id}/reviews/'
+            '{review_id}/comments/` авторы комментариев загружаются через '
+            '`select_related`'
+        )
+        wrong_url = (f'/api/v1/titles/{titles[1]["id"]}/reviews/'
+                     f'{reviews[0]["id"]}/comments/')
+        assert client.get(wrong_url).status_code == 404, (
+            'Проверьте, что комментарии доступны только по отзыву '
+            'того произведения, которое указано в адресе'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_reviews_page_queries(self, client, admin_client, monkeypatch):
+        from api.pagination import PubDatePagination
+        from reviews.models import Review, Title
+        from reviews.ratings import rebuild_ratings
+        from users.models import User
+
+        title = Title.objects.create(name='Популярное', year=2000)
+        User.objects.bulk_create(
+            User(username=f'reviewer{number}',
+                 email=f'reviewer{number}@yamdb.fake')
+            for number in range(50)
+        )
+        Review.objects.bulk_create(
+            Review(text='Отзыв', score=5, author=author, title=title)
+            for author in User.objects.filter(username__startswith='reviewer')
+        )
+        rebuild_ratings()
+        monkeypatch.setattr(PubDatePagination, 'page_size', 50)
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        assert len(response.json()['results']) == 50
+        assert len(context) <= 4, (
+            'Проверьте, что при GET запросе `/api/v1/titles/{title_id}/reviews/` '
+            'авторы отзывов загружаются через `select_related`'
+        )
+        review = Review.objects.first()
+        with CaptureQueriesContext(connection) as context:
+            client.get(f'{url}{review.id}/')
+        assert len(context) <= 3, (
+            'Проверьте, что при GET запросе `/api/v1/titles/{title_id}/reviews/'
+            '{review_id}/` автор загружается вместе с отзывом'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_06_title_write_queries(self, admin_client):
+        create_genre(admin_client)
+        create_categories(admin_client)
+        data = {'name': 'Произведение', 'year': 2000,
+                'genre': ['horror', 'comedy', 'drama'], 'category': 'films'}
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.post('/api/v1/titles/', data=data)
+        assert response.status_code == 201
+        slug_selects = [query for query in context
+                        if query['sql'].startswith('SELECT')
+                        and 'FROM "reviews_genre"' in query['sql']
+                        and '"slug" IN' in query['sql']]
+        assert len(slug_selects) <= 1, (
+            'Проверьте, что slug\'и жанров разрешаются одним запросом `IN`'
+        )
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.post('/api/v1/titles/', data=data)
+        assert response.status_code == 201
+        assert not [query for query in context
+                    if '"slug" IN' in query['sql']], (
+            'Проверьте, что жанры и категории берутся из кеша в памяти'
+        )
+        inserts = [query for query in context
+                   if query['sql'].startswith('INSERT')
+                   and '"reviews_title_genre"' in query['sql']]
+        assert len(inserts) == 1, (
+            'Проверьте, что жанры произведения записываются одной вставкой'
+        )
+
+        title_id = response.json()['id']
+        response = admin_client.patch(f'/api/v1/titles/{title_id}/',
+                                      data={'genre': ['drama', 'horror']},
+                                      format='json')
+        assert response.status_code == 200
+        assert sorted(genre['slug'] for genre in response.json()['genre']) == [
+            'drama', 'horror'], (
+            'Проверьте, что при PATCH запросе жанры произведения заменяются'
+        )
+        admin_client.post('/api/v1/genres/', data={'name': 'Новый', 'slug': 'new'})
+        response = admin_client.patch(f'/api/v1/titles/{title_id}/',
+                                      data={'genre': ['new']}, format='json')
+        assert response.status_code == 200, (
+            'Проверьте, что новый жанр доступен сразу после создания'
+        )
+        admin_client.delete('/api/v1/genres/new/')
+        response = admin_client.patch(f'/api/v1/titles/{title_id}/',
+                                      data={'genre': ['new']}, format='json')
+        assert response.status_code == 400, (
+            'Проверьте, что удалённый жанр сразу пропадает из кеша'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_07_slug_deleted_in_other_worker(self, admin_client):
+        from api.cache import invalidate
+        from api.fields import get_slug_cache
+        from reviews.models import Genre
+
+        create_genre(admin_client)
+        create_categories(admin_client)
+        data = {'name': 'Произведение', 'year': 2000,
+                'genre': ['horror'], 'category': 'films'}
+        assert admin_client.post('/api/v1/titles/', data=data).status_code == 201
+        # Другой воркер удаляет жанр: сигналы этого процесса не сработают.
+        table = Genre._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM reviews_title_genre WHERE genre_id IN '
+                           f'(SELECT id FROM {table} WHERE slug = %s)',
+                           ['horror'])
+            cursor.execute(f'DELETE FROM {table} WHERE slug = %s',
+                           ['horror'])
+        response = admin_client.post('/api/v1/titles/', data=data)
+        assert response.status_code == 400, (
+            'Проверьте, что жанр, удалённый после кеширования slug, '
+            'даёт ошибку поля, а не 500'
+        )
+        assert 'genre' in response.json()
+        cache = get_slug_cache(Genre)
+        assert 'comedy' in cache.resolve(['comedy'])
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {table} WHERE slug = %s', ['comedy'])
+        assert 'comedy' in cache.resolve(['comedy'])
+        # Поколение увеличивает сигнал в другом процессе.
+        pid = os.fork()
+        if pid == 0:
+            try:
+                invalidate('genres')
+            finally:
+                os._exit(0)
+        os.waitpid(pid, 0)
+        assert cache.resolve(['comedy']) == {}, (
+            'Проверьте, что кеш slug\'ов сбрасывается по поколению '
+            'в общем кеше, которое меняют сигналы любого воркера'
+        )
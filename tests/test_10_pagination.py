@@ -0,0 +1,178 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .common import create_reviews
+
+
+class Test10CursorPagination:
+
+    def walk(self, client, url):
+        items = []
+        while url:
+            response = client.get(url)
+            assert response.status_code == 200, (
+                f'Проверьте, что при GET запросе `{url}` возвращается статус 200'
+            )
+            data = response.json()
+            assert 'count' not in data, (
+                'Проверьте, что в курсорном режиме не считается `count`'
+            )
+            items.extend(data['results'])
+            url = data['next']
+        return items
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_titles_cursor(self, client, admin_client):
+        from reviews.models import Title
+
+        Title.objects.bulk_create(
+            Title(name=f'Произведение {number % 4}', year=2000)
+            for number in range(12)
+        )
+        titles = self.walk(client, '/api/v1/titles/?pagination=cursor')
+        expected = list(Title.objects.order_by('name', 'id')
+                        .values_list('id', flat=True))
+        assert [title['id'] for title in titles] == expected, (
+            'Проверьте, что курсорная пагинация `/api/v1/titles/` '
+            'проходит все произведения по порядку `name`, `id` без повторов'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_reviews_cursor(self, client, admin_client, admin):
+        reviews, titles, _, _ = create_reviews(admin_client, admin)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        with CaptureQueriesContext(connection) as context:
+            client.get(url + '?pagination=cursor')
+        assert not any('__count' in query['sql'] for query in context), (
+            'Проверьте, что курсорная пагинация не выполняет `COUNT(*)`'
+        )
+        found = self.walk(client, url + '?pagination=cursor')
+        assert [review['id'] for review in found] == [
+            review['id'] for review in reviews
+        ], (
+            'Проверьте, что курсорная пагинация `/api/v1/titles/{title_id}/reviews/` '
+            'возвращает отзывы по порядку `pub_date`'
+        )
+
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_cursor_many_equal_names(self, client):
+        from reviews.models import Title
+
+        Title.objects.bulk_create(
+            Title(name='Одно название', year=2000) for _ in range(1100)
+        )
+        Title.objects.bulk_create(
+            Title(name=name, year=2000) for name in ('А', 'Я')
+        )
+        url = '/api/v1/titles/?pagination=cursor'
+        response = client.get(url)
+        url = response.json()['next']
+        for _ in range(5):
+            response = client.get(url)
+            url = response.json()['next']
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        page_query = [query['sql'] for query in context
+                      if 'LIMIT' in query['sql']][-1]
+        assert 'OFFSET' not in page_query, (
+            'Проверьте, что курсорная пагинация выбирает страницу '
+            'условием по ключу, а не через `OFFSET`'
+        )
+        titles = self.walk(client, '/api/v1/titles/?pagination=cursor')
+        ids = [title['id'] for title in titles]
+        assert len(ids) == len(set(ids)) == 1102, (
+            'Проверьте, что курсорная пагинация проходит больше 1000 '
+            'произведений с одинаковым названием без повторов'
+        )
+        assert ids == list(Title.objects.order_by('name', 'id')
+                           .values_list('id', flat=True))
+        back = []
+        url = response.json()['previous']
+        while url:
+            data = client.get(url).json()
+            back = data['results'] + back
+            url = data['previous']
+        assert [title['id'] for title in back] == ids[:len(back)], (
+            'Проверьте, что ссылка `previous` ведёт назад по тому же порядку'
+        )
+        assert back and back[0]['name'] == 'А'
+
+def count_queries(context):
+    # COUNT по id в запросе валидаторов ETag к пагинации не относится.
+    return [query for query in context if 'COUNT(*)' in query['sql']]
+
+
+class Test10PaginationCount:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_reviews_count_from_rating(self, client, admin_client, admin):
+        reviews, titles, _, _ = create_reviews(admin_client, admin)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        assert response.json()['count'] == len(reviews), (
+            'Проверьте, что `count` отзывов совпадает с их количеством'
+        )
+        assert not count_queries(context), (
+            'Проверьте, что количество отзывов берётся из счётчика '
+            'произведения, а не из `COUNT(*)`'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_titles_count_cached(self, client, admin_client):
+        from reviews.models import Title
+
+        Title.objects.bulk_create(
+            Title(name=f'Произведение {number}', year=2000)
+            for number in range(12)
+        )
+        assert client.get('/api/v1/titles/').json()['count'] == 12
+        with CaptureQueriesContext(connection) as context:
+            response = client.get('/api/v1/titles/?page=2')
+        assert response.json()['count'] == 12
+        assert not count_queries(context), (
+            'Проверьте, что количество произведений берётся из кеша'
+        )
+        admin_client.post('/api/v1/categories/',
+                          data={'name': 'Фильм', 'slug': 'films'})
+        admin_client.post('/api/v1/titles/', data={
+            'name': 'Новое', 'year': 2000, 'genre': [], 'category': 'films'})
+        response = client.get('/api/v1/titles/?page=2')
+        assert response.json()['count'] == 13, (
+            'Проверьте, что кеш количества сбрасывается вместе с кешем '
+            'ответов произведений'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_estimated_count(self, client, settings):
+        from api.cache import invalidate
+        from reviews.models import Title
+
+        Title.objects.bulk_create(
+            Title(name=f'Произведение {number:02}', year=2000)
+            for number in range(12)
+        )
+        settings.PAGINATION_COUNT_THRESHOLD = 3
+        url = '/api/v1/titles/'
+        data = client.get(url).json()
+        assert data['count_estimated'] is True, (
+            'Проверьте, что выше порога `count` отдаётся как оценка'
+        )
+        assert data['count'] > 3
+        found = []
+        while url:
+            response = client.get(url)
+            assert response.status_code == 200
+            data = response.json()
+            found.extend(title['id'] for title in data['results'])
+            url = data['next']
+        assert len(found) == len(set(found)) == 12, (
+            'Проверьте, что при оценке `count` ссылки `next` проходят '
+            'все страницы'
+        )
+        settings.PAGINATION_COUNT_THRESHOLD = 100
+        invalidate('titles')
+        data = client.get(data['previous']).json()
+        assert data['count'] == 12 and 'count_estimated' not in data
@@ -0,0 +1,55 @@
+import pytest
+
+from .common import create_titles
+
+
+class Test11TitleSearch:
+
+    def names(self, client, query):
+        response = client.get(f'/api/v1/titles/?name={query}')
+        assert response.status_code == 200, (
+            'Проверьте, что при GET запросе `/api/v1/titles/?name=` '
+            'возвращается статус 200'
+        )
+        return [title['name'] for title in response.json()['results']]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_search_prefix(self, client, admin_client):
+        create_titles(admin_client)
+        assert self.names(client, 'пово') == ['Поворот туда'], (
+            'Проверьте, что поиск по `name` находит произведение '
+            'по началу слова без учёта регистра'
+        )
+        assert self.names(client, 'туда') == ['Поворот туда'], (
+            'Проверьте, что поиск по `name` находит произведение по любому слову'
+        )
+        assert self.names(client, 'нет такого') == [], (
+            'Проверьте, что поиск по `name` не находит лишнего'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_search_sync(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        admin_client.patch(f'/api/v1/titles/{titles[1]["id"]}/',
+                           data={'name': 'Поворот обратно'})
+        assert sorted(self.names(client, 'поворот')) == [
+            'Поворот обратно', 'Поворот туда'
+        ], (
+            'Проверьте, что индекс поиска обновляется при изменении произведения'
+        )
+        admin_client.delete(f'/api/v1/titles/{titles[0]["id"]}/')
+        assert self.names(client, 'поворот') == ['Поворот обратно'], (
+            'Проверьте, что индекс поиска обновляется при удалении произведения'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_search_rank(self, client, admin_client):
+        from reviews.models import Title
+
+        Title.objects.create(name='Дом у дороги, где дорога и дом', year=2000)
+        Title.objects.create(name='Дорога', year=2000)
+        assert self.names(client, 'дорога') == [
+            'Дорога', 'Дом у дороги, где дорога и дом'
+        ], (
+            'Проверьте, что результаты поиска упорядочены по релевантности'
+        )
@@ -0,0 +1,86 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+
+class Test12LoadCsv:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_load_csv(self, client):
+        from reviews.models import Comments, Review, Title
+
+        output = StringIO()
+        call_command('load_csv', stdout=output)
+        assert 'строк/с' in output.getvalue(), (
+            'Проверьте, что команда `load_csv` выводит скорость загрузки файлов'
+        )
+        assert Title.objects.count() == 30, (
+            'Проверьте, что команда `load_csv` загружает произведения'
+        )
+        title = Title.objects.filter(reviews__isnull=False).first()
+        assert title.genre.exists(), (
+            'Проверьте, что команда `load_csv` загружает жанры произведений'
+        )
+        scores = list(title.reviews.values_list('score', flat=True))
+        assert (title.rating_sum, title.rating_count) == (
+            sum(scores), len(scores)
+        ), (
+            'Проверьте, что команда `load_csv` пересчитывает рейтинг произведений'
+        )
+        comment = Comments.objects.get(id=1)
+        assert comment.pub_date.year == 2020, (
+            'Проверьте, что команда `load_csv` сохраняет дату публикации из файла'
+        )
+        reviews_count = Review.objects.count()
+        call_command('load_csv', stdout=StringIO())
+        assert Review.objects.count() == reviews_count, (
+            'Проверьте, что повторный запуск `load_csv` не дублирует данные'
+        )
+        response = client.get('/api/v1/titles/?name=список')
+        assert response.json()['count'] == 1, (
+            'Проверьте, что команда `load_csv` обновляет индекс поиска'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_conflicting_parent_rows(self):
+        from reviews.models import Review
+        from users.models import User
+
+        User.objects.create(id=5000, username='bingobongo',
+                            email='other@yamdb.fake')
+        output = StringIO()
+        call_command('load_csv', stdout=output)
+        assert 'users.csv' in output.getvalue()
+        assert 'не вставлено 1 строк' in output.getvalue(), (
+            'Проверьте, что `load_csv` сообщает о строках, '
+            'не вставленных из-за конфликтов'
+        )
+        assert not User.objects.filter(id=100).exists()
+        assert not Review.objects.filter(author_id=100).exists(), (
+            'Проверьте, что `load_csv` пропускает строки, ссылающиеся '
+            'на невставленные записи'
+        )
+        assert Review.objects.exists()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_sequences_reset(self, monkeypatch):
+        from django.db import connection
+
+        from reviews.models import Comments, Review, Title
+        from users.models import User
+
+        models = []
+
+        def sequence_reset_sql(style, model_list):
+            models.extend(model_list)
+            return []
+
+        monkeypatch.setattr(connection.ops, 'sequence_reset_sql',
+                            sequence_reset_sql)
+        call_command('load_csv', stdout=StringIO())
+        assert {User, Title, Title.genre.through, Review,
+                Comments} <= set(models), (
+            'Проверьте, что после загрузки файлов `load_csv` сдвигает '
+            'последовательности id, как `loaddata`'
+        )
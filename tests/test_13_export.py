@@ -0,0 +1,74 @@
+import csv
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from .common import create_comments, create_titles
+
+
+class Test13Export:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_export_permissions(self, client, user_client):
+        for api_client, status in ((client, 401), (user_client, 403)):
+            response = api_client.get('/api/v1/export/titles.csv')
+            assert response.status_code == status, (
+                'Проверьте, что выгрузка `/api/v1/export/` доступна только администратору'
+            )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_export_csv(self, admin_client, admin):
+        _, reviews, titles, _, _ = create_comments(admin_client, admin)
+        response = admin_client.get('/api/v1/export/reviews.csv')
+        assert response.status_code == 200, (
+            'Проверьте, что GET запрос `/api/v1/export/reviews.csv` '
+            'от администратора возвращает статус 200'
+        )
+        assert response.streaming, (
+            'Проверьте, что выгрузка отдаётся через `StreamingHttpResponse`'
+        )
+        content = b''.join(response.streaming_content).decode()
+        rows = list(csv.DictReader(StringIO(content)))
+        assert list(rows[0]) == [
+            'id', 'text', 'pub_date', 'score', 'author_id', 'title_id'
+        ], (
+            'Проверьте, что колонки выгрузки отзывов совпадают с `static/data/review.csv`'
+        )
+        assert [int(row['id']) for row in rows] == [
+            review['id'] for review in reviews
+        ], (
+            'Проверьте, что выгрузка отзывов содержит все отзывы'
+        )
+        assert rows[0]['pub_date'].endswith('Z'), (
+            'Проверьте, что дата публикации выгружается в формате `static/data`'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_export_ndjson(self, admin_client, admin):
+        comments, _, _, _, _ = create_comments(admin_client, admin)
+        response = admin_client.get('/api/v1/export/comments.ndjson')
+        content = b''.join(response.streaming_content).decode()
+        lines = [json.loads(line) for line in content.splitlines()]
+        assert [line['text'] for line in lines] == [
+            comment['text'] for comment in comments
+        ], (
+            'Проверьте, что выгрузка комментариев в NDJSON содержит все комментарии'
+        )
+        assert admin_client.get('/api/v1/export/users.csv').status_code == 404, (
+            'Проверьте, что для неизвестной выгрузки возвращается статус 404'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_export_command(self, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        output = StringIO()
+        call_command('export_data', 'titles', '--format', 'ndjson',
+                     stdout=output)
+        lines = [json.loads(line) for line in output.getvalue().splitlines()]
+        assert sorted(line['id'] for line in lines) == sorted(
+            title['id'] for title in titles
+        ), (
+            'Проверьте, что команда `export_data` выгружает все произведения'
+        )
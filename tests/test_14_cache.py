@@ -0,0 +1,117 @@
+import os
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .common import auth_client, create_titles, create_users_api
+
+
+class Test14ResponseCache:
+
+    def queries(self, client, url):
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        return response, len(context)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_titles_cached(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        first, _ = self.queries(client, url)
+        second, queries = self.queries(client, url)
+        assert queries <= 1, (
+            'Проверьте, что повторный GET запрос `/api/v1/titles/{title_id}/` '
+            'отдаётся из кеша, в БД идёт только запрос для ETag'
+        )
+        assert first.json() == second.json(), (
+            'Проверьте, что закешированный ответ совпадает с исходным'
+        )
+        user, _ = create_users_api(admin_client)
+        auth_client(user).post(f'/api/v1/titles/{titles[0]["id"]}/reviews/',
+                               data={'text': 'Текст', 'score': 7})
+        response, _ = self.queries(client, url)
+        assert response.json()['rating'] == 7, (
+            'Проверьте, что новый отзыв сбрасывает кеш произведений'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_invalidation(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        url = '/api/v1/titles/?genre=drama'
+        assert client.get(url).json()['count'] == 1
+        admin_client.patch(f'/api/v1/titles/{titles[0]["id"]}/',
+                           data={'genre': ['drama']})
+        assert client.get(url).json()['count'] == 2, (
+            'Проверьте, что изменение жанров произведения сбрасывает кеш'
+        )
+        admin_client.delete('/api/v1/genres/drama/')
+        response = client.get('/api/v1/genres/')
+        assert 'drama' not in [genre['slug'] for genre in response.json()['results']], (
+            'Проверьте, что удаление жанра сбрасывает кеш жанров'
+        )
+        response = client.get(f'/api/v1/titles/{titles[1]["id"]}/')
+        assert response.json()['genre'] == [], (
+            'Проверьте, что удаление жанра сбрасывает кеш произведений'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_cache_stats(self, client, admin_client, user_client):
+        client.get('/api/v1/categories/')
+        client.get('/api/v1/categories/')
+        assert user_client.get('/api/v1/cache-stats/').status_code == 403, (
+            'Проверьте, что статистика кеша доступна только администратору'
+        )
+        stats = admin_client.get('/api/v1/cache-stats/').json()
+        assert stats['categories']['hits'] >= 1, (
+            'Проверьте, что `/api/v1/cache-stats/` считает попадания в кеш'
+        )
+        assert stats['categories']['misses'] >= 1, (
+            'Проверьте, что `/api/v1/cache-stats/` считает промахи кеша'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_review_invalidates_own_title(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        url = '/api/v1/titles/{}/'
+        for title in titles:
+            client.get(url.format(title['id']))
+        client.get('/api/v1/titles/')
+        admin_client.post(f'{url.format(titles[0]["id"])}reviews/',
+                          data={'text': 'Текст', 'score': 7})
+        _, queries = self.queries(client, url.format(titles[1]['id']))
+        assert queries <= 1, (
+            'Проверьте, что отзыв не сбрасывает кеш карточек '
+            'других произведений'
+        )
+        response, _ = self.queries(client, url.format(titles[0]['id']))
+        assert response.json()['rating'] == 7
+        ratings = {title['id']: title['rating'] for title in
+                   client.get('/api/v1/titles/').json()['results']}
+        assert ratings[titles[0]['id']] == 7, (
+            'Проверьте, что отзыв сбрасывает кеш списков произведений'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_invalidation_shared_by_workers(self, client, admin_client):
+        from reviews.models import Title
+
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        client.get(url)
+        # Запись в другом воркере: строка меняется мимо сигналов этого
+        # процесса, кеш сбрасывает дочерний процесс.
+        Title.objects.filter(id=titles[0]['id']).update(name='Изменено')
+        pid = os.fork()
+        if pid == 0:
+            try:
+                from api.cache import invalidate_objects
+
+                invalidate_objects('titles', titles[0]['id'])
+            finally:
+                os._exit(0)
+        os.waitpid(pid, 0)
+        assert client.get(url).json()['name'] == 'Изменено', (
+            'Проверьте, что кеш ответов общий для воркеров: сброс в одном '
+            'процессе виден в остальных'
+        )
@@ -0,0 +1,102 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils.http import http_date
+
+from .common import create_comments
+
+
+class Test15ConditionalGet:
+
+    def assert_not_modified(self, client, url, **headers):
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url, **headers)
+        assert response.status_code == 304, (
+            f'Проверьте, что GET запрос `{url}` с актуальным валидатором '
+            'возвращает статус 304'
+        )
+        assert len(context) <= 2, (
+            f'Проверьте, что ответ 304 на `{url}` не загружает объекты'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_reviews_etag(self, client, admin_client, admin):
+        comments, reviews, titles, _, _ = create_comments(admin_client, admin)
+        urls = (
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/',
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/',
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/comments/',
+            f'/api/v1/titles/{titles[0]["id"]}/',
+        )
+        for url in urls:
+            response = client.get(url)
+            assert response.has_header('ETag'), (
+                f'Проверьте, что ответ на GET запрос `{url}` содержит `ETag`'
+            )
+            self.assert_not_modified(
+                client, url, HTTP_IF_NONE_MATCH=response['ETag'])
+            if url.endswith('reviews/') or url.endswith('comments/'):
+                assert not response.has_header('Last-Modified'), (
+                    f'Проверьте, что ответ на GET запрос списка `{url}` '
+                    'не содержит `Last-Modified`'
+                )
+                continue
+            assert response.has_header('Last-Modified'), (
+                f'Проверьте, что ответ на GET запрос `{url}` содержит `Last-Modified`'
+            )
+            self.assert_not_modified(
+                client, url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_etag_changes(self, client, admin_client, admin):
+        _, reviews, titles, _, _ = create_comments(admin_client, admin)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        etag = client.get(url)['ETag']
+        admin_client.patch(f'{url}{reviews[0]["id"]}/', data={'text': 'Новый'})
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            'Проверьте, что после изменения отзыва ETag списка отзывов меняется'
+        )
+        title_url = f'/api/v1/titles/{titles[0]["id"]}/'
+        etag = client.get(title_url)['ETag']
+        admin_client.patch('/api/v1/titles/' + str(titles[0]['id']) + '/',
+                           data={'genre': ['drama']})
+        response = client.get(title_url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            'Проверьте, что после изменения жанров ETag произведения меняется'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_list_changes_after_delete(self, client, admin_client, admin):
+        _, reviews, titles, _, _ = create_comments(admin_client, admin)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        etag = client.get(url)['ETag']
+        admin_client.delete(f'{url}{reviews[0]["id"]}/')
+        assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 200
+        response = client.get(url, HTTP_IF_MODIFIED_SINCE=http_date())
+        assert response.status_code == 200, (
+            'Проверьте, что после удаления отзыва список отзывов '
+            'не отдаётся как неизменённый'
+        )
+        assert reviews[0]['id'] not in [
+            review['id'] for review in response.json()['results']]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_etag_changes_on_author_rename(self, client, admin_client,
+                                              admin):
+        _, reviews, titles, _, _ = create_comments(admin_client, admin)
+        author = reviews[0]['author']
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        urls = (url, f'{url}{reviews[0]["id"]}/',
+                f'{url}{reviews[0]["id"]}/comments/')
+        etags = [client.get(item)['ETag'] for item in urls]
+        admin_client.patch(f'/api/v1/users/{author}/',
+                           data={'username': 'renamed'})
+        for item, etag in zip(urls, etags):
+            response = client.get(item, HTTP_IF_NONE_MATCH=etag)
+            assert response.status_code == 200, (
+                f'Проверьте, что после смены имени автора ETag `{item}` '
+                'меняется'
+            )
+        assert client.get(f'{url}{reviews[0]["id"]}/').json()[
+            'author'] == 'renamed'
@@ -0,0 +1,98 @@
+from io import StringIO
+
+import pytest
+from django.core import mail
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.management import call_command
+from django.utils import timezone
+
+
+class FailingBackend(BaseEmailBackend):
+
+    def send_messages(self, email_messages):
+        raise ConnectionError('SMTP недоступен')
+
+
+class Test16EmailOutbox:
+    url_signup = '/api/v1/auth/signup/'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_signup_queues_email(self, client, settings):
+        from users.models import OutgoingEmail
+
+        settings.EMAIL_OUTBOX_SYNC = False
+        outbox_before_count = len(mail.outbox)
+        data = {'email': 'queued@yamdb.fake', 'username': 'queued'}
+        response = client.post(self.url_signup, data=data)
+        assert response.status_code == 200
+        assert len(mail.outbox) == outbox_before_count, (
+            'Проверьте, что при POST запросе `/api/v1/auth/signup/` '
+            'письмо не отправляется внутри запроса'
+        )
+        email = OutgoingEmail.objects.get()
+        assert email.status == OutgoingEmail.PENDING, (
+            'Проверьте, что письмо с кодом ставится в очередь `OutgoingEmail`'
+        )
+        call_command('send_emails', '--once', stdout=StringIO())
+        assert len(mail.outbox) == outbox_before_count + 1, (
+            'Проверьте, что команда `send_emails` отправляет письма из очереди'
+        )
+        assert 'queued@yamdb.fake' in mail.outbox[-1].to
+        email.refresh_from_db()
+        assert email.status == OutgoingEmail.SENT, (
+            'Проверьте, что отправленное письмо помечается как отправленное'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_retry_with_backoff(self, client, settings):
+        from users.models import OutgoingEmail
+
+        settings.EMAIL_OUTBOX_SYNC = False
+        settings.EMAIL_OUTBOX_MAX_ATTEMPTS = 2
+        settings.EMAIL_BACKEND = 'tests.test_16_outbox.FailingBackend'
+        client.post(self.url_signup,
+                    data={'email': 'retry@yamdb.fake', 'username': 'retry'})
+        call_command('send_emails', '--once', stdout=StringIO())
+        email = OutgoingEmail.objects.get()
+        assert email.status == OutgoingEmail.PENDING and email.attempts == 1, (
+            'Проверьте, что после ошибки письмо остаётся в очереди'
+        )
+        assert email.next_attempt > timezone.now(), (
+            'Проверьте, что повторная попытка откладывается'
+        )
+        OutgoingEmail.objects.update(next_attempt=timezone.now())
+        call_command('send_emails', '--once', stdout=StringIO())
+        email.refresh_from_db()
+        assert email.status == OutgoingEmail.FAILED, (
+            'Проверьте, что после исчерпания попыток письмо помечается '
+            'как неотправленное'
+        )
+        assert 'SMTP' in email.last_error
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_sync_delivery_claims_email(self, client, settings):
+        from users.models import OutgoingEmail
+        from users.outbox import claim, deliver, queue_mail
+
+        outbox_before_count = len(mail.outbox)
+        client.post(self.url_signup,
+                    data={'email': 'sync@yamdb.fake', 'username': 'sync'})
+        email = OutgoingEmail.objects.get()
+        assert email.status == OutgoingEmail.SENT and email.attempts == 1, (
+            'Проверьте, что при `EMAIL_OUTBOX_SYNC` письмо проходит '
+            'тот же путь, что и в воркере, и помечается отправленным'
+        )
+        call_command('send_emails', '--once', stdout=StringIO())
+        assert len(mail.outbox) == outbox_before_count + 1, (
+            'Проверьте, что отправленное сразу письмо воркер не отправляет '
+            'повторно'
+        )
+        settings.EMAIL_OUTBOX_SYNC = False
+        leased = queue_mail('Тема', 'Текст', 'from@yamdb.fake',
+                            ['leased@yamdb.fake'])
+        assert [item.pk for item in claim(10)] == [leased.pk]
+        deliver(claim(1, pks=[leased.pk]))
+        assert len(mail.outbox) == outbox_before_count + 1, (
+            'Проверьте, что письмо, захваченное воркером, не отправляется '
+            'повторно'
+        )
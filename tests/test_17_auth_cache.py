@@ -0,0 +1,47 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class Test17AuthCache:
+
+    def user_queries(self, client, url):
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        return response, [
+            query for query in context if 'FROM "users_user"' in query['sql']
+        ]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_cached_user(self, admin_client):
+        self.user_queries(admin_client, '/api/v1/users/')
+        response, queries = self.user_queries(admin_client, '/api/v1/categories/')
+        assert response.status_code == 200
+        assert not queries, (
+            'Проверьте, что аутентифицированный запрос не загружает '
+            'пользователя из БД, если он есть в кеше'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_invalidation(self, admin_client, user, user_client):
+        url = '/api/v1/users/'
+        assert user_client.get(url).status_code == 403
+        response = admin_client.patch(f'/api/v1/users/{user.username}/',
+                                      data={'role': 'admin'})
+        assert response.status_code == 200
+        assert user_client.get(url).status_code == 200, (
+            'Проверьте, что изменение роли пользователя сбрасывает кеш аутентификации'
+        )
+        admin_client.delete(f'/api/v1/users/{user.username}/')
+        assert user_client.get(url).status_code == 401, (
+            'Проверьте, что удалённый пользователь не проходит аутентификацию'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_inactive_user(self, user, user_client):
+        assert user_client.get('/api/v1/users/me/').status_code == 200
+        user.is_active = False
+        user.save()
+        assert user_client.get('/api/v1/users/me/').status_code == 401, (
+            'Проверьте, что неактивный пользователь не проходит аутентификацию'
+        )
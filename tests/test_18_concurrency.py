@@ -0,0 +1,57 @@
+from concurrent.futures import ThreadPoolExecutor
+from threading import Barrier
+
+import pytest
+from django.db import IntegrityError, connection
+
+from .common import auth_client, create_titles
+
+
+class Test18ReviewConcurrency:
+    workers = 8
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_parallel_duplicate_reviews(self, admin_client, user):
+        from reviews.models import Review, Title
+
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        barrier = Barrier(self.workers)
+
+        def post(score):
+            client = auth_client(user)
+            barrier.wait()
+            try:
+                return client.post(url, data={'text': 'Дубль', 'score': score})
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            responses = list(pool.map(post, range(1, self.workers + 1)))
+        statuses = sorted(response.status_code for response in responses)
+        assert statuses == [201] + [400] * (self.workers - 1), (
+            'Проверьте, что при параллельных POST запросах '
+            '`/api/v1/titles/{title_id}/reviews/` создаётся ровно один отзыв, '
+            'а остальные получают статус 400'
+        )
+        assert Review.objects.filter(title_id=titles[0]['id']).count() == 1
+        title = Title.objects.get(id=titles[0]['id'])
+        assert title.rating_count == 1, (
+            'Проверьте, что отклонённые отзывы не меняют рейтинг произведения'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_other_integrity_errors(self, admin_client, user,
+                                       monkeypatch):
+        from reviews.models import Review
+
+        titles, _, _ = create_titles(admin_client)
+
+        def save(*args, **kwargs):
+            raise IntegrityError('FOREIGN KEY constraint failed')
+
+        monkeypatch.setattr(Review, 'save', save)
+        with pytest.raises(IntegrityError):
+            auth_client(user).post(
+                f'/api/v1/titles/{titles[0]["id"]}/reviews/',
+                data={'text': 'Отзыв', 'score': 5})
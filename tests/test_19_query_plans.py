@@ -0,0 +1,70 @@
+import re
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .common import create_comments
+
+# Полный проход по таблице без индекса. Проход по подзапросу с LIMIT,
+# которым пагинация ограничивает COUNT(*), ограничен порогом.
+FULL_SCAN = re.compile(r'^SCAN (TABLE )?(?!subquery$)\S+$')
+TEMP_SORT = 'USE TEMP B-TREE FOR ORDER BY'
+
+# Адрес и таблица, чья выборка страницы должна идти в порядке индекса.
+ENDPOINTS = (
+    ('/api/v1/titles/', 'reviews_title'),
+    ('/api/v1/titles/?category=films', 'reviews_title'),
+    ('/api/v1/titles/?year=2000', 'reviews_title'),
+    ('/api/v1/titles/?genre=drama', None),
+    ('/api/v1/titles/?name=пово', None),
+    ('/api/v1/titles/?pagination=cursor', 'reviews_title'),
+    ('/api/v1/titles/{title}/', None),
+    ('/api/v1/titles/{title}/reviews/', 'reviews_review'),
+    ('/api/v1/titles/{title}/reviews/?pagination=cursor', 'reviews_review'),
+    ('/api/v1/titles/{title}/reviews/{review}/', None),
+    ('/api/v1/titles/{title}/reviews/{review}/comments/', 'reviews_comments'),
+    ('/api/v1/titles/{title}/reviews/{review}/comments/{comment}/', None),
+)
+
+
+def query_plans(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200, (
+        f'Проверьте, что при GET запросе `{url}` возвращается статус 200'
+    )
+    plans = []
+    with connection.cursor() as cursor:
+        for query in context:
+            if not query['sql'].startswith('SELECT'):
+                continue
+            cursor.execute('EXPLAIN QUERY PLAN ' + query['sql'].replace('%', '%%'))
+            plans.append((query['sql'], [row[-1] for row in cursor.fetchall()]))
+    return plans
+
+
+class Test19QueryPlans:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_no_full_scans(self, client, admin_client, admin):
+        comments, reviews, titles, _, _ = create_comments(admin_client, admin)
+        ids = {'title': titles[0]['id'], 'review': reviews[0]['id'],
+               'comment': comments[0]['id']}
+        for template, ordered_table in ENDPOINTS:
+            url = template.format(**ids)
+            for sql, plan in query_plans(client, url):
+                scans = [line for line in plan if FULL_SCAN.match(line)]
+                assert not scans, (
+                    f'Проверьте индексы: запрос для `{url}` выполняет полный '
+                    f'проход по таблице ({scans}):\n{sql}'
+                )
+                page_query = (
+                    ordered_table
+                    and f'FROM "{ordered_table}"' in sql
+                    and ' LIMIT ' in sql
+                )
+                assert not (page_query and TEMP_SORT in plan), (
+                    f'Проверьте индексы: страница `{url}` сортируется во '
+                    f'временном B-дереве вместо обхода индекса:\n{sql}'
+                )
@@ -0,0 +1,183 @@
+import json
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .common import create_categories, create_genre
+
+URL = '/api/v1/titles/bulk/'
+
+
+def titles_data(amount, start=0):
+    return [{'name': f'Пакетное {number}', 'year': 2000,
+             'genre': ['horror', 'drama'], 'category': 'films',
+             'description': 'Из пачки'}
+            for number in range(start, start + amount)]
+
+
+class Test20BulkTitles:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_permissions(self, client, user_client, moderator_client):
+        response = client.post(URL, data='[]', content_type='application/json')
+        assert response.status_code == 401, (
+            'Проверьте, что `/api/v1/titles/bulk/` недоступен анонимам'
+        )
+        for role_client in (user_client, moderator_client):
+            response = role_client.post(URL, data=[], format='json')
+            assert response.status_code == 403, (
+                'Проверьте, что `/api/v1/titles/bulk/` доступен только админу'
+            )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_create(self, client, admin_client):
+        from reviews.models import Title
+
+        create_genre(admin_client)
+        create_categories(admin_client)
+        client.get('/api/v1/titles/')
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.post(URL, data=titles_data(200),
+                                         format='json')
+        assert response.status_code == 201, (
+            'Проверьте, что POST запрос `/api/v1/titles/bulk/` с корректными '
+            'данными возвращает статус 201'
+        )
+        assert len(context) <= 15, (
+            'Проверьте, что пачка произведений проверяется и вставляется '
+            'за постоянное число запросов'
+        )
+        data = response.json()
+        assert data['created'] == 200
+        ids = [result['id'] for result in data['results']]
+        assert len(set(ids)) == 200
+        title = Title.objects.get(pk=ids[10])
+        assert title.name == 'Пакетное 10', (
+            'Проверьте, что id в ответе соответствуют элементам пачки'
+        )
+        assert sorted(title.genre.values_list('slug', flat=True)) == [
+            'drama', 'horror']
+        assert title.category.slug == 'films'
+        response = client.get('/api/v1/titles/')
+        assert response.json()['count'] == 200, (
+            'Проверьте, что пакетное создание сбрасывает кеш произведений'
+        )
+        response = client.get('/api/v1/titles/?name=Пакетное')
+        assert response.json()['count'] == 200, (
+            'Проверьте, что произведения из пачки попадают в поиск'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_errors_per_item(self, admin_client):
+        from reviews.models import Title
+
+        create_genre(admin_client)
+        create_categories(admin_client)
+        items = titles_data(3)
+        items[1]['genre'] = ['unknown']
+        items[2]['year'] = 3000
+        items.append('не объект')
+        response = admin_client.post(URL, data=items, format='json')
+        assert response.status_code == 207, (
+            'Проверьте, что при частично корректной пачке возвращается 207'
+        )
+        results = response.json()['results']
+        assert 'id' in results[0]
+        assert 'genre' in results[1]['errors']
+        assert 'year' in results[2]['errors']
+        assert 'errors' in results[3]
+        assert Title.objects.count() == 1
+        response = admin_client.post(URL, data=items[1:], format='json')
+        assert response.status_code == 400
+        response = admin_client.post(URL, data={'name': 'Одно'},
+                                     format='json')
+        assert response.status_code == 400, (
+            'Проверьте, что `/api/v1/titles/bulk/` принимает только список'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_ndjson(self, admin_client):
+        from reviews.models import Title
+
+        create_genre(admin_client)
+        create_categories(admin_client)
+        body = '\n'.join(json.dumps(item) for item in titles_data(5)) + '\n'
+        response = admin_client.generic(
+            'POST', URL, body.encode(), content_type='application/x-ndjson')
+        assert response.status_code == 201, (
+            'Проверьте, что `/api/v1/titles/bulk/` принимает NDJSON'
+        )
+        assert Title.objects.count() == 5
+        response = admin_client.generic(
+            'POST', URL, b'{"name": 1}\n{oops\n',
+            content_type='application/x-ndjson')
+        assert response.status_code == 400
+
+    @pytest.mark.parametrize('returning', (True, False))
+    @pytest.mark.django_db(transaction=True)
+    def test_05_ids_not_reused(self, admin_client, monkeypatch, returning):
+        from api import bulk
+        from reviews.models import Title
+
+        if not returning:
+            # SQLite без RETURNING: строки вставляются по одной.
+            monkeypatch.setattr(bulk, 'SQLITE_RETURNING', (99,))
+        create_genre(admin_client)
+        create_categories(admin_client)
+        response = admin_client.post(URL, data=titles_data(3), format='json')
+        ids = [result['id'] for result in response.json()['results']]
+        Title.objects.filter(pk=ids[-1]).delete()
+        response = admin_client.post(URL, data=titles_data(2, start=3),
+                                     format='json')
+        new_ids = [result['id'] for result in response.json()['results']]
+        assert min(new_ids) > max(ids), (
+            'Проверьте, что пакетное создание не выдаёт id удалённых '
+            'произведений'
+        )
+        assert list(Title.objects.filter(pk__in=new_ids).order_by('pk')
+                    .values_list('name', flat=True)) == [
+            'Пакетное 3', 'Пакетное 4']
+
+    @pytest.mark.django_db(transaction=True)
+    def test_06_reference_deleted_elsewhere(self, admin_client):
+        from reviews.models import Genre, Title
+
+        create_genre(admin_client)
+        create_categories(admin_client)
+        admin_client.post(URL, data=titles_data(1), format='json')
+        # Удаление в другом воркере: сигналы этого процесса не сработают.
+        through = Title.genre.through._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {through} WHERE genre_id IN (SELECT id FROM '
+                f'{Genre._meta.db_table} WHERE slug = %s)', ['horror'])
+            cursor.execute(
+                f'DELETE FROM {Genre._meta.db_table} WHERE slug = %s',
+                ['horror'])
+        items = titles_data(2, start=1)
+        items[1]['genre'] = ['drama']
+        response = admin_client.post(URL, data=items, format='json')
+        assert response.status_code == 207, (
+            'Проверьте, что жанр, удалённый после кеширования slug, '
+            'даёт ошибку элемента, а не 500'
+        )
+        results = response.json()['results']
+        assert 'genre' in results[0]['errors']
+        assert Title.objects.filter(pk=results[1]['id']).exists()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_07_limits_before_parsing(self, admin_client, settings):
+        settings.TITLES_BULK_MAX_BYTES = 100
+        response = admin_client.post(URL, data=titles_data(5), format='json')
+        assert response.status_code == 413, (
+            'Проверьте, что размер пачки проверяется по `Content-Length`'
+        )
+        settings.TITLES_BULK_MAX_BYTES = 10 ** 6
+        settings.TITLES_BULK_LIMIT = 2
+        body = '\n'.join(json.dumps(item) for item in titles_data(3))
+        response = admin_client.generic(
+            'POST', URL, body.encode(), content_type='application/x-ndjson')
+        assert response.status_code == 400, (
+            'Проверьте, что NDJSON с лишними строками отклоняется'
+        )
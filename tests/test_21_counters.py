@@ -0,0 +1,74 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .common import create_comments
+
+
+class Test21Counters:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_comments_count(self, client, admin_client, admin):
+        from reviews.models import Comments, Review
+
+        comments, reviews, titles, _, _ = create_comments(admin_client, admin)
+        review = Review.objects.get(id=reviews[0]['id'])
+        assert review.comments_count == 3, (
+            'Проверьте, что при создании комментария растёт '
+            '`comments_count` отзыва'
+        )
+        Comments.objects.get(id=comments[0]['id']).delete()
+        review.refresh_from_db()
+        assert review.comments_count == 2, (
+            'Проверьте, что при удалении комментария `comments_count` '
+            'уменьшается'
+        )
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        response = client.get(f'{url}{review.id}/')
+        assert response.json()['comments_count'] == 2, (
+            'Проверьте, что `comments_count` есть в ответе отзыва'
+        )
+        response = client.get(f'/api/v1/titles/{titles[0]["id"]}/')
+        assert response.json()['reviews_count'] == 3, (
+            'Проверьте, что `reviews_count` есть в ответе произведения'
+        )
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(f'{url}{review.id}/comments/')
+        assert response.json()['count'] == 2
+        assert not [query for query in context
+                    if 'COUNT(*)' in query['sql']], (
+            'Проверьте, что количество комментариев берётся из счётчика'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_review_etag(self, client, admin_client, admin):
+        comments, reviews, titles, _, _ = create_comments(admin_client, admin)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/'
+        etag = client.get(url)['ETag']
+        admin_client.post(f'{url}comments/', data={'text': 'Ещё один'})
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            'Проверьте, что новый комментарий меняет ETag отзыва'
+        )
+        assert response.json()['comments_count'] == 4
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_reconcile(self, admin_client, admin):
+        from reviews.models import Review, Title
+
+        comments, reviews, titles, _, _ = create_comments(admin_client, admin)
+        Review.objects.update(comments_count=100)
+        Title.objects.update(rating_count=100)
+        call_command('reconcile_counters', stdout=StringIO())
+        assert Review.objects.get(id=reviews[0]['id']).comments_count == 3, (
+            'Проверьте, что команда `reconcile_counters` чинит '
+            '`comments_count`'
+        )
+        assert Review.objects.get(id=reviews[1]['id']).comments_count == 0
+        assert Title.objects.get(id=titles[0]['id']).reviews_count == 3, (
+            'Проверьте, что команда `reconcile_counters` чинит '
+            'счётчик отзывов'
+        )
@@ -0,0 +1,82 @@
+import datetime as dt
+import io
+import uuid
+from decimal import Decimal
+
+import pytest
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from .common import create_titles
+
+DATA = {
+    'count': 2,
+    'next': None,
+    'results': [
+        {'id': 1, 'name': 'Поворот туда   "кавычки"', 'rating': 7.5,
+         'genre': [{'name': 'Ужасы', 'slug': 'horror'}], 'category': None},
+        {'id': 2, 'name': 'Эмодзи 🎬', 'rating': None, 'flag': True},
+    ],
+    'pub_date': dt.datetime(2022, 8, 19, 17, 48, 1, 123456,
+                            tzinfo=dt.timezone.utc),
+    'day': dt.date(2022, 8, 19),
+    'price': Decimal('1.50'),
+    'uid': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+    5: 'ключ-число',
+}
+
+
+class Test22FastJSON:
+
+    def test_01_render_same_bytes(self, monkeypatch):
+        from api import renderers
+        from api.renderers import FastJSONRenderer
+
+        expected = JSONRenderer().render(DATA)
+        assert FastJSONRenderer().render(DATA) == expected, (
+            'Проверьте, что `FastJSONRenderer` выдаёт те же байты, '
+            'что и `JSONRenderer`'
+        )
+        assert FastJSONRenderer().render(None) == b''
+        indented = FastJSONRenderer().render(
+            DATA, 'application/json; indent=4')
+        assert indented == JSONRenderer().render(
+            DATA, 'application/json; indent=4')
+        wide = {'id': 2 ** 70, 'negative': -2 ** 64}
+        assert FastJSONRenderer().render(wide) == (
+            JSONRenderer().render(wide)), (
+            'Проверьте, что целые шире 64 бит рендерятся через stdlib json'
+        )
+        monkeypatch.setattr(renderers, 'orjson', None)
+        assert FastJSONRenderer().render(DATA) == expected, (
+            'Проверьте, что без orjson рендерер работает на stdlib json'
+        )
+
+    def test_02_parse(self, monkeypatch):
+        from api import parsers
+        from api.parsers import FastJSONParser
+
+        body = JSONRenderer().render(
+            {'name': 'Поворот', 'genre': ['horror', 'drama'], 'year': 2000})
+        expected = JSONParser().parse(io.BytesIO(body))
+        assert FastJSONParser().parse(io.BytesIO(body)) == expected
+        with pytest.raises(ParseError):
+            FastJSONParser().parse(io.BytesIO(b'{"rating": NaN}'))
+        monkeypatch.setattr(parsers, 'orjson', None)
+        assert FastJSONParser().parse(io.BytesIO(body)) == expected
+        with pytest.raises(ParseError):
+            FastJSONParser().parse(io.BytesIO(b'{"rating": NaN}'))
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_api(self, client, admin_client, monkeypatch):
+        from api import renderers
+
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        fast = client.get(url)
+        assert fast['Content-Type'] == 'application/json'
+        monkeypatch.setattr(renderers, 'orjson', None)
+        assert client.get(url).content == fast.content, (
+            'Проверьте, что ответ API не зависит от наличия orjson'
+        )
@@ -0,0 +1,86 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .common import create_comments, create_titles
+
+
+def get(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200, (
+        f'Проверьте, что при GET запросе `{url}` возвращается статус 200'
+    )
+    return response.json(), [query['sql'] for query in context]
+
+
+class Test23SparseFields:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_titles(self, client, admin_client):
+        create_titles(admin_client)
+        data, queries = get(client, '/api/v1/titles/?fields=id,name,rating')
+        for title in data['results']:
+            assert list(title) == ['id', 'name', 'rating'], (
+                'Проверьте, что `?fields=` оставляет только перечисленные '
+                'поля произведения'
+            )
+        assert len(queries) == 2, (
+            'Проверьте, что без `genre` в `?fields=` жанры не загружаются'
+        )
+        assert not any('reviews_category' in sql for sql in queries), (
+            'Проверьте, что без `category` в `?fields=` категория '
+            'не присоединяется'
+        )
+        assert not any('"description"' in sql for sql in queries), (
+            'Проверьте, что запрос выбирает только нужные колонки'
+        )
+        data, _ = get(client, '/api/v1/titles/?omit=description,genre')
+        assert list(data['results'][0]) == [
+            'id', 'name', 'year', 'rating', 'reviews_count', 'category'], (
+            'Проверьте, что `?omit=` убирает перечисленные поля'
+        )
+        assert data['results'][0]['category']['slug']
+        title_id = data['results'][0]['id']
+        data, _ = get(client, f'/api/v1/titles/{title_id}/?fields=genre')
+        assert list(data) == ['genre'] and data['genre'], (
+            'Проверьте, что `?fields=` работает для отдельного произведения'
+        )
+        response = client.get('/api/v1/titles/?fields=id,secret')
+        assert response.status_code == 400, (
+            'Проверьте, что неизвестное поле в `?fields=` возвращает 400'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_reviews_and_comments(self, client, admin_client, admin):
+        comments, reviews, titles, _, _ = create_comments(admin_client, admin)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        data, queries = get(client, f'{url}?fields=id,score')
+        assert [list(review) for review in data['results']] == [
+            ['id', 'score']] * len(reviews), (
+            'Проверьте, что `?fields=` работает для отзывов'
+        )
+        assert not any('"users_user"' in sql for sql in queries), (
+            'Проверьте, что без `author` автор отзыва не присоединяется'
+        )
+        assert not any('"text"' in sql for sql in queries)
+        data, _ = get(client, f'{url}{reviews[0]["id"]}/comments/?omit=text')
+        assert 'text' not in data['results'][0]
+        assert data['results'][0]['author'] == comments[0]['author'], (
+            'Проверьте, что `?omit=` работает для комментариев'
+        )
+        response = admin_client.post(
+            f'{url}{reviews[0]["id"]}/comments/?fields=id',
+            data={'text': 'Новый'})
+        assert response.status_code == 201
+        assert response.json()['text'] == 'Новый', (
+            'Проверьте, что `?fields=` не влияет на запись'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_users(self, admin_client, admin):
+        data, queries = get(admin_client, '/api/v1/users/?fields=username')
+        assert data['results'] == [{'username': admin.username}], (
+            'Проверьте, что `?fields=` работает для пользователей'
+        )
+        assert not any('"bio"' in sql for sql in queries if 'LIMIT' in sql)
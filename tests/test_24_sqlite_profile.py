@@ -0,0 +1,53 @@
+import os
+
+import pytest
+from django.db import connection
+
+
+def open_connection(path):
+    from django.db.backends.sqlite3.base import DatabaseWrapper
+
+    wrapper = DatabaseWrapper({**connection.settings_dict, 'NAME': path})
+    wrapper.connect()
+    return wrapper
+
+
+def pragma(wrapper, name):
+    with wrapper.cursor() as cursor:
+        cursor.execute(f'PRAGMA {name}')
+        return cursor.fetchone()[0]
+
+
+class Test24SqliteProfile:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_pragmas_applied(self, tmp_path, settings):
+        settings.SQLITE_PRAGMAS = {
+            'journal_mode': 'WAL',
+            'synchronous': 'NORMAL',
+            'busy_timeout': 5000,
+        }
+        wrapper = open_connection(os.path.join(tmp_path, 'wal.sqlite3'))
+        try:
+            assert pragma(wrapper, 'journal_mode') == 'wal', (
+                'Проверьте, что при открытии соединения включается WAL'
+            )
+            assert pragma(wrapper, 'synchronous') == 1
+            assert pragma(wrapper, 'busy_timeout') == 5000, (
+                'Проверьте, что прагмы из `SQLITE_PRAGMAS` применяются '
+                'к каждому новому соединению'
+            )
+        finally:
+            wrapper.close()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_default_profile(self, tmp_path, settings):
+        settings.SQLITE_PRAGMAS = {}
+        wrapper = open_connection(os.path.join(tmp_path, 'plain.sqlite3'))
+        try:
+            assert pragma(wrapper, 'journal_mode') == 'delete', (
+                'Проверьте, что без профиля production режим журнала '
+                'не меняется'
+            )
+        finally:
+            wrapper.close()
@@ -0,0 +1,136 @@
+import sqlite3
+
+import pytest
+
+from .common import create_reviews, create_titles
+
+
+@pytest.fixture
+def replica(tmp_path, settings):
+    """Реплика — копия тестовой базы в отдельном файле. Копия снимается
+    вызовом фикстуры, дальше файлы расходятся."""
+    from django.db import connection, connections
+
+    path = str(tmp_path / 'replica.sqlite3')
+    connections.databases['replica'] = dict(connection.settings_dict,
+                                            NAME=path)
+    settings.DATABASE_REPLICAS = ['replica']
+
+    def snapshot():
+        connections['replica'].close()
+        source = sqlite3.connect(connection.settings_dict['NAME'])
+        target = sqlite3.connect(path)
+        with target:
+            source.backup(target)
+        source.close()
+        target.close()
+
+    yield snapshot
+    connections['replica'].close()
+    del connections['replica']
+    del connections.databases['replica']
+
+
+class Test25Replicas:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_cache_filled_from_primary(self, client, admin_client,
+                                          replica):
+        titles, _, _ = create_titles(admin_client)
+        replica()
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        response = admin_client.patch(url, data={'name': 'Изменено'})
+        assert response.status_code == 200
+        assert response.json()['name'] == 'Изменено', (
+            'Проверьте, что запросы на запись читают из основной базы'
+        )
+        assert client.get(url).json()['name'] == 'Изменено', (
+            'Проверьте, что промах кеша ответов читает основную базу, '
+            'а не отставшую реплику'
+        )
+        replica()
+        from reviews.models import Title
+
+        Title.objects.filter(id=titles[0]['id']).update(name='Мимо кеша')
+        assert client.get(url).json()['name'] == 'Изменено', (
+            'Проверьте, что ответ из кеша не перечитывается из базы'
+        )
+        admin_client.post('/api/v1/categories/',
+                          data={'name': 'Новая', 'slug': 'new'})
+        slugs = [category['slug'] for category in
+                 client.get('/api/v1/categories/').json()['results']]
+        assert 'new' in slugs, (
+            'Проверьте, что после записи в кеш категорий не попадает '
+            'список из реплики'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_reviews_read_replica(self, client, admin_client, admin,
+                                     replica):
+        from reviews.models import Review
+
+        reviews, titles, _, _ = create_reviews(admin_client, admin)
+        replica()
+        Review.objects.filter(id=reviews[0]['id']).update(text='Изменено')
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/'
+        assert client.get(url).json()['text'] == reviews[0]['text'], (
+            'Проверьте, что GET запрос к отзыву читает из реплики'
+        )
+        admin_client.post(f'{url}comments/', data={'text': 'Комментарий'})
+        response = client.get(f'{url}comments/')
+        assert response.json()['results'] == [], (
+            'Проверьте, что GET запрос к комментариям читает из реплики'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_pinned_after_write(self, admin_client, replica):
+        from api.replicas import replica_reads
+        from reviews.models import Title
+
+        replica()
+        assert Title.objects.all().db == 'default', (
+            'Проверьте, что вне безопасного запроса чтение идёт из основной '
+            'базы'
+        )
+        with replica_reads():
+            assert Title.objects.all().db == 'replica'
+            title = Title.objects.create(name='Новое', year=2000)
+            assert Title.objects.all().db == 'default', (
+                'Проверьте, что после записи запрос закрепляется за '
+                'основной базой'
+            )
+            assert Title.objects.get(id=title.id).name == 'Новое'
+        assert Title.objects.all().db == 'default'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_etags_checked_on_primary(self, client, admin_client, admin,
+                                         replica):
+        reviews, titles, _, _ = create_reviews(admin_client, admin)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        replica()
+        fresh = client.get(url)
+        assert fresh.status_code == 200 and 'ETag' in fresh, (
+            'Проверьте, что ответы из реплики получают ETag'
+        )
+        assert client.get(
+            url, HTTP_IF_NONE_MATCH=fresh['ETag']).status_code == 304, (
+            'Проверьте, что реплика не отключает ответы 304'
+        )
+        admin_client.patch(f'{url}{reviews[0]["id"]}/',
+                           data={'text': 'Изменено'})
+        stale = client.get(url)
+        assert 'Изменено' not in [
+            review['text'] for review in stale.json()['results']]
+        assert stale['ETag'] == fresh['ETag'], (
+            'Проверьте, что ETag ответа из реплики описывает данные реплики'
+        )
+        response = client.get(url, HTTP_IF_NONE_MATCH=stale['ETag'])
+        assert response.status_code == 200, (
+            'Проверьте, что ETag проверяется по основной базе: отставшая '
+            'реплика не должна подтверждать устаревшую копию ответом 304'
+        )
+        replica()
+        current = client.get(url)
+        assert current['ETag'] != stale['ETag']
+        assert client.get(
+            url, HTTP_IF_NONE_MATCH=current['ETag']).status_code == 304
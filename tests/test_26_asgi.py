@@ -0,0 +1,212 @@
+import asyncio
+import json
+import threading
+
+import pytest
+
+from .common import create_titles
+
+
+def call(application, method, path, query=b'', body=b'', headers=(),
+         disconnect_after=None):
+    """Запрос к ASGI-приложению. Как uvicorn, после тела ``receive``
+    ждёт отключения клиента, а ``send`` после отключения ничего
+    не делает."""
+    scope = {
+        'type': 'http', 'http_version': '1.1', 'method': method,
+        'scheme': 'http', 'path': path, 'root_path': '',
+        'query_string': query, 'server': ('testserver', 80),
+        'client': ('127.0.0.1', 5000), 'headers': list(headers),
+    }
+    chunks = [body[:3], body[3:]] if body else [b'']
+    messages = [{'type': 'http.request', 'body': chunk,
+                 'more_body': number < len(chunks) - 1}
+                for number, chunk in enumerate(chunks)]
+    sent = []
+    disconnected = None
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        await disconnected.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        if disconnected.is_set():
+            return
+        sent.append(message)
+        if disconnect_after is not None and len(sent) >= disconnect_after:
+            disconnected.set()
+
+    async def main():
+        nonlocal disconnected
+        disconnected = asyncio.Event()
+        await application(scope, receive, send)
+
+    asyncio.run(main())
+    start = sent[0]
+    return (start['status'], dict(start['headers']),
+            b''.join(message.get('body', b'') for message in sent[1:]))
+
+
+@pytest.fixture
+def application():
+    from django.core.wsgi import get_wsgi_application
+
+    from api.asgi import ASGIHandler
+
+    handler = ASGIHandler(get_wsgi_application())
+    yield handler
+    handler.read_executor.shutdown(wait=True)
+    handler.executor.shutdown(wait=True)
+
+
+class Test26ASGI:
+
+    def test_01_catalogue_routes(self):
+        from api.asgi import is_catalogue_read
+
+        def scope(method, path):
+            return {'method': method, 'path': path}
+
+        for path in ('/api/v1/titles/', '/api/v1/titles/1/',
+                     '/api/v1/titles/1/reviews/',
+                     '/api/v1/titles/1/reviews/2/comments/3/'):
+            assert is_catalogue_read(scope('GET', path)), (
+                f'Проверьте, что `{path}` обслуживается пулом чтения каталога'
+            )
+        assert not is_catalogue_read(scope('POST', '/api/v1/titles/'))
+        assert not is_catalogue_read(scope('GET', '/api/v1/users/'))
+        assert not is_catalogue_read(scope('GET', '/api/v1/titles/bulk/'))
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_same_response(self, client, admin_client, application):
+        titles, _, _ = create_titles(admin_client)
+        status, headers, body = call(application, 'GET', '/api/v1/titles/',
+                                     query=b'fields=id,name')
+        assert status == 200
+        assert headers[b'content-type'] == b'application/json'
+        assert json.loads(body) == client.get(
+            '/api/v1/titles/?fields=id,name').json(), (
+            'Проверьте, что ответ через ASGI совпадает с ответом через WSGI'
+        )
+        status, _, _ = call(application, 'GET', '/api/v1/titles/0/')
+        assert status == 404
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_body_and_streaming(self, admin_client, token_admin,
+                                   application):
+        titles, _, _ = create_titles(admin_client)
+        auth = (b'authorization', f'Bearer {token_admin["access"]}'.encode())
+        body = json.dumps({'name': 'Категория', 'slug': 'asgi'}).encode()
+        status, _, _ = call(application, 'POST', '/api/v1/categories/',
+                            body=body, headers=[
+                                auth, (b'content-type', b'application/json'),
+                                (b'content-length', str(len(body)).encode())])
+        assert status == 201, (
+            'Проверьте, что тело запроса, пришедшее частями, дочитывается'
+        )
+        status, headers, body = call(application, 'GET',
+                                     '/api/v1/export/titles.ndjson',
+                                     headers=[auth])
+        assert status == 200
+        assert len(body.splitlines()) == len(titles), (
+            'Проверьте, что потоковые ответы отдаются через ASGI целиком'
+        )
+
+    def test_04_stream_stays_on_one_thread(self):
+        from api.asgi import ASGIHandler
+
+        threads, closed = [], threading.Event()
+
+        class Streaming:
+            streaming = True
+
+            def __init__(self, total):
+                self.total = total
+
+            def __iter__(self):
+                for number in range(self.total):
+                    threads.append(threading.get_ident())
+                    yield str(number).encode()
+
+            def close(self):
+                threads.append(threading.get_ident())
+                closed.set()
+
+        def wsgi_application(environ, start_response):
+            threads.append(threading.get_ident())
+            start_response('200 OK', [('Content-Type', 'text/plain')])
+            return Streaming(int(environ['QUERY_STRING'] or 100))
+
+        handler = ASGIHandler(wsgi_application)
+        try:
+            status, _, body = call(handler, 'GET', '/api/v1/export/x')
+            assert status == 200
+            assert body == ''.join(map(str, range(100))).encode()
+            assert closed.is_set() and len(set(threads)) == 1, (
+                'Проверьте, что потоковый ответ целиком читается и '
+                'закрывается в потоке, где выполнялась вьюха'
+            )
+            threads.clear()
+            closed.clear()
+            status, _, _ = call(handler, 'GET', '/api/v1/export/x',
+                                query=b'1000000', disconnect_after=3)
+            assert status == 200
+            assert closed.wait(5), (
+                'Проверьте, что при отключении клиента ответ закрывается'
+            )
+            assert len(threads) < 1000, (
+                'Проверьте, что после `http.disconnect` поток перестаёт '
+                'читать потоковый ответ'
+            )
+        finally:
+            handler.read_executor.shutdown(wait=True)
+            handler.executor.shutdown(wait=True)
+
+    def test_05_repeated_headers(self):
+        from api.asgi import build_environ
+
+        environ = build_environ({
+            'method': 'GET', 'path': '/', 'headers': [
+                (b'cookie', b'a=1'), (b'cookie', b'b=2'),
+                (b'accept', b'text/html'), (b'accept', b'*/*'),
+            ]}, b'')
+        assert environ['HTTP_COOKIE'] == 'a=1; b=2', (
+            'Проверьте, что повторные заголовки `Cookie` склеиваются через `; `'
+        )
+        assert environ['HTTP_ACCEPT'] == 'text/html,*/*'
+
+    def test_06_body_limit(self, settings):
+        from api.asgi import ASGIHandler
+
+        calls = []
+
+        def wsgi_application(environ, start_response):
+            calls.append(environ['wsgi.input'].read())
+            start_response('200 OK', [('Content-Type', 'text/plain')])
+            return [b'ok']
+
+        settings.ASGI_MAX_BODY_SIZE = 10
+        handler = ASGIHandler(wsgi_application)
+        try:
+            status, _, _ = call(handler, 'POST', '/api/v1/titles/bulk/',
+                                body=b'x' * 11,
+                                headers=[(b'content-length', b'11')])
+            assert status == 413, (
+                'Проверьте, что тело больше `ASGI_MAX_BODY_SIZE` по '
+                '`Content-Length` отклоняется с 413'
+            )
+            status, _, _ = call(handler, 'POST', '/api/v1/titles/bulk/',
+                                body=b'x' * 11)
+            assert status == 413, (
+                'Проверьте, что тело без `Content-Length` перестаёт '
+                'читаться, как только превышает лимит'
+            )
+            assert calls == []
+            status, _, body = call(handler, 'POST', '/api/v1/titles/bulk/',
+                                   body=b'x' * 10)
+            assert (status, body, calls) == (200, b'ok', [b'x' * 10])
+        finally:
+            handler.read_executor.shutdown(wait=True)
+            handler.executor.shutdown(wait=True)
@@ -0,0 +1,91 @@
+import json
+import re
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .common import create_titles
+
+SERVER_TIMING = re.compile(
+    r'^db;dur=(?P<db>[\d.]+);desc="(?P<queries>\d+) queries", '
+    r'serialize;dur=(?P<serialize>[\d.]+), render;dur=(?P<render>[\d.]+), '
+    r'total;dur=(?P<total>[\d.]+)$'
+)
+
+
+class Test27Instrumentation:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_server_timing(self, client, admin_client, settings):
+        settings.INSTRUMENTATION_SERVER_TIMING = True
+        create_titles(admin_client)
+        with CaptureQueriesContext(connection) as context:
+            response = client.get('/api/v1/titles/')
+        match = SERVER_TIMING.match(response.get('Server-Timing', ''))
+        assert match, (
+            'Проверьте, что в ответе есть заголовок `Server-Timing` '
+            'с фазами db, serialize, render и total'
+        )
+        assert int(match['queries']) == len(context), (
+            'Проверьте, что в `Server-Timing` учитываются все запросы к БД'
+        )
+        assert float(match['serialize']) > 0 and float(match['render']) > 0
+        assert float(match['total']) >= (
+            float(match['serialize']) + float(match['render']))
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_endpoint_stats(self, client, admin_client, user_client):
+        from api.instrumentation import endpoint_stats
+
+        titles, _, _ = create_titles(admin_client)
+        before = endpoint_stats().get('TitleViewSet.retrieve', {'count': 0})
+        client.get(f'/api/v1/titles/{titles[0]["id"]}/')
+        client.get(f'/api/v1/titles/{titles[1]["id"]}/')
+        assert user_client.get('/api/v1/request-stats/').status_code == 403
+        response = admin_client.get('/api/v1/request-stats/')
+        assert response.status_code == 200, (
+            'Проверьте, что `/api/v1/request-stats/` доступен админу'
+        )
+        stats = response.json()['TitleViewSet.retrieve']
+        assert stats['count'] == before['count'] + 2, (
+            'Проверьте, что замеры копятся по эндпоинтам `ViewSet.action`'
+        )
+        assert stats['avg_queries'] > 0
+        assert 'TitleViewSet.create' in response.json()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_sampled_log(self, client, settings, caplog):
+        from api import instrumentation
+
+        instrumentation.logger.addHandler(caplog.handler)
+        try:
+            settings.INSTRUMENTATION_LOG_SAMPLE_RATE = 0
+            client.get('/api/v1/genres/')
+            assert not caplog.records, (
+                'Проверьте, что лог пишется только для выборки запросов'
+            )
+            settings.INSTRUMENTATION_LOG_SAMPLE_RATE = 1
+            client.get('/api/v1/genres/')
+        finally:
+            instrumentation.logger.removeHandler(caplog.handler)
+        record = json.loads(caplog.records[-1].getMessage())
+        assert record['endpoint'] == 'GenreViewSet.list', (
+            'Проверьте, что строка лога содержит эндпоинт в виде '
+            '`ViewSet.action`'
+        )
+        assert {'status', 'duration_ms', 'queries', 'db_ms',
+                'serialize_ms', 'render_ms'} <= set(record)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_server_timing_for_admins(self, client, admin_client,
+                                         user_client):
+        assert 'Server-Timing' not in client.get('/api/v1/titles/'), (
+            'Проверьте, что по умолчанию `Server-Timing` не отдаётся '
+            'анонимным клиентам'
+        )
+        assert 'Server-Timing' not in user_client.get('/api/v1/titles/')
+        assert SERVER_TIMING.match(
+            admin_client.get('/api/v1/titles/').get('Server-Timing', '')), (
+            'Проверьте, что админ получает заголовок `Server-Timing`'
+        )
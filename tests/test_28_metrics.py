@@ -0,0 +1,153 @@
+import os
+import re
+
+import pytest
+
+from .common import create_titles
+
+SAMPLE = re.compile(r'^(?P<name>\w+)(?:\{(?P<labels>.*)\})? (?P<value>\S+)$')
+LABEL = re.compile(r'(\w+)="((?:[^"\\]|\\.)*)"')
+
+
+def scrape(client):
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response['Content-Type'].startswith('text/plain; version=0.0.4')
+    samples = {}
+    for line in response.content.decode().splitlines():
+        if line.startswith('#'):
+            continue
+        match = SAMPLE.match(line)
+        assert match, f'Строка `{line}` не в формате Prometheus'
+        labels = frozenset(LABEL.findall(match['labels'] or ''))
+        samples[(match['name'], labels)] = float(match['value'])
+    return samples
+
+
+def sample(samples, name, **labels):
+    return samples.get((name, frozenset(labels.items())), 0)
+
+
+class Test28Metrics:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_access(self, client, user_client, admin_client, settings):
+        assert client.get('/metrics').status_code == 401
+        assert user_client.get('/metrics').status_code == 403, (
+            'Проверьте, что `/metrics` недоступен обычному пользователю'
+        )
+        assert admin_client.get('/metrics').status_code == 200
+        settings.METRICS_ALLOWED_IPS = ['10.0.0.0/8']
+        assert client.get('/metrics').status_code == 401
+        settings.METRICS_ALLOWED_IPS = ['10.0.0.0/8', '127.0.0.0/8']
+        assert client.get('/metrics').status_code == 200, (
+            'Проверьте, что `/metrics` доступен адресам '
+            'из `METRICS_ALLOWED_IPS`'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_request_histograms(self, client, admin_client):
+        endpoint = 'TitleViewSet.list'
+        create_titles(admin_client)
+        before = scrape(admin_client)
+        client.get('/api/v1/titles/')
+        client.get('/api/v1/titles/')
+        samples = scrape(admin_client)
+        count = sample(samples, 'api_request_duration_seconds_count',
+                       endpoint=endpoint)
+        assert count == sample(before, 'api_request_duration_seconds_count',
+                               endpoint=endpoint) + 2, (
+            'Проверьте, что время запросов копится в гистограмме '
+            'по эндпоинтам `ViewSet.action`'
+        )
+        assert sample(samples, 'api_request_duration_seconds_bucket',
+                      endpoint=endpoint, le='+Inf') == count
+        buckets = [value for (name, labels), value in samples.items()
+                   if name == 'api_request_duration_seconds_bucket'
+                   and ('endpoint', endpoint) in labels]
+        assert len(buckets) == 12
+        assert sample(samples, 'api_request_queries_count',
+                      endpoint=endpoint) == count
+        assert sample(samples, 'api_request_queries_sum',
+                      endpoint=endpoint) > sample(
+            before, 'api_request_queries_sum', endpoint=endpoint), (
+            'Проверьте, что число запросов к БД копится в гистограмме'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_cache_outbox_and_auth(self, client, admin_client, settings):
+        settings.EMAIL_OUTBOX_SYNC = False
+        client.get('/api/v1/genres/')
+        client.get('/api/v1/genres/')
+        before = scrape(admin_client)
+        client.post('/api/v1/auth/signup/',
+                    data={'email': 'metrics@yamdb.fake',
+                          'username': 'metrics'})
+        client.post('/api/v1/auth/token/',
+                    data={'username': 'metrics',
+                          'confirmation_code': 'wrong'})
+        samples = scrape(admin_client)
+        assert sample(samples, 'api_cache_hit_ratio', cache='genres') > 0, (
+            'Проверьте, что в метриках есть доля попаданий в кеш ответов'
+        )
+        assert sample(samples, 'api_cache_requests_total',
+                      cache='genres', result='hit') >= 1
+        assert sample(samples, 'api_email_outbox_emails',
+                      status='pending') == 1, (
+            'Проверьте, что в метриках есть размер очереди писем'
+        )
+        assert sample(samples, 'api_signups_total', result='sent') == (
+            sample(before, 'api_signups_total', result='sent') + 1), (
+            'Проверьте, что считаются запросы кода подтверждения'
+        )
+        assert sample(samples, 'api_tokens_total', result='invalid') == (
+            sample(before, 'api_tokens_total', result='invalid') + 1)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_workers_share_directory(self, admin_client, settings,
+                                        tmp_path):
+        from api.metrics import signups
+
+        settings.METRICS_DIR = str(tmp_path)
+        signups.inc(result='sent')
+        pid = os.fork()
+        if pid == 0:
+            try:
+                signups.inc(result='sent', amount=2)
+            finally:
+                os._exit(0)
+        os.waitpid(pid, 0)
+        assert len(list(tmp_path.glob('*.db'))) == 2, (
+            'Проверьте, что каждый воркер пишет метрики в свой файл'
+        )
+        samples = scrape(admin_client)
+        assert sample(samples, 'api_signups_total', result='sent') == 3, (
+            'Проверьте, что `/metrics` складывает счётчики всех воркеров'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_dead_workers_absorbed(self, admin_client, settings,
+                                      tmp_path):
+        from api.metrics import signups, store
+
+        settings.METRICS_DIR = str(tmp_path)
+        signups.inc(result='sent')
+        pid = os.fork()
+        if pid == 0:
+            try:
+                signups.inc(result='sent', amount=2)
+            finally:
+                os._exit(0)
+        os.waitpid(pid, 0)
+        # Новый воркер после завершения прежнего.
+        store.pid = None
+        signups.inc(result='sent')
+        assert [path.name for path in tmp_path.glob('*.db')] == [
+            f'{os.getpid()}.db'], (
+            'Проверьте, что файлы завершившихся воркеров удаляются'
+        )
+        samples = scrape(admin_client)
+        assert sample(samples, 'api_signups_total', result='sent') == 4, (
+            'Проверьте, что значения завершившихся воркеров не теряются '
+            'и не считаются дважды'
+        )